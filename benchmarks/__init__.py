@@ -0,0 +1 @@
+"""Benchmarks de sentinel_solar contra un servidor local que imita la API de Sentinel."""
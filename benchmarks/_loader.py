@@ -0,0 +1,22 @@
+"""Carga los módulos de la integración sin ejecutar su ``__init__`` (que requiere Home Assistant).
+
+``api.py`` y ``metrics.py`` no dependen de Home Assistant, así que los benchmarks
+pueden usar ``SentinelClient`` directamente registrando un paquete vacío.
+"""
+from __future__ import annotations
+from pathlib import Path
+import importlib
+import sys
+import types
+
+COMPONENT_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "sentinel_solar"
+PACKAGE = "sentinel_solar"
+
+
+def load(module: str) -> types.ModuleType:
+    """Importa ``sentinel_solar.<module>`` desde el código del repositorio."""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(COMPONENT_DIR)]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{module}")
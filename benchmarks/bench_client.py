@@ -0,0 +1,178 @@
+"""Benchmark de ``SentinelClient`` contra el servidor simulado.
+
+Mide throughput, latencia de cola y reintentos al crecer el número de assets y
+la concurrencia. El resultado es JSON para poder comparar entre versiones:
+
+    python -m benchmarks.bench_client --assets 1,10,50 --concurrency 1,4,16 --output bench.json
+    python -m benchmarks.bench_client --baseline bench.json --max-regression 0.2
+"""
+from __future__ import annotations
+from typing import Any, Optional
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+
+import aiohttp
+
+from ._loader import load
+from .mock_server import SHAPES, MockConfig, MockSentinelServer
+
+api = load("api")
+metrics = load("metrics")
+
+INSTANT_ENDPOINT = "/api/asset/{id}/power-data/instant"
+
+
+async def run_scenario(
+    base_url: str,
+    server: MockSentinelServer,
+    assets: int,
+    concurrency: int,
+    rounds: int,
+) -> dict[str, Any]:
+    """Ejecuta ``rounds`` consultas de ``assets`` assets con un cliente nuevo."""
+    asset_ids = [f"asset-{i}" for i in range(assets)]
+    timings = metrics.RequestTimings()
+    server.counters.clear()
+    connector = aiohttp.TCPConnector(limit_per_host=max(concurrency, 1))
+    async with aiohttp.ClientSession(
+        connector=connector, trace_configs=[metrics.create_trace_config(timings)]
+    ) as session:
+        client = api.SentinelClient(
+            session, base_url, "bench-token", max_concurrency=concurrency, timings=timings
+        )
+        round_times = []
+        failures = 0
+        started = time.perf_counter()
+        for _ in range(rounds):
+            round_start = time.perf_counter()
+            results = await client.fetch_power_instant_many(asset_ids)
+            round_times.append(time.perf_counter() - round_start)
+            failures += sum(isinstance(r, BaseException) for r in results.values())
+        elapsed = time.perf_counter() - started
+
+    client_metrics = client.get_metrics()
+    total = timings.get(INSTANT_ENDPOINT, metrics.PHASE_TOTAL)
+    ttfb = timings.get(INSTANT_ENDPOINT, metrics.PHASE_TTFB)
+    calls = assets * rounds
+    return {
+        "assets": assets,
+        "concurrency": concurrency,
+        "rounds": rounds,
+        "calls": calls,
+        "failures": failures,
+        "http_requests": server.counters["instant"],
+        "retries": client_metrics["total_retries"],
+        "server_responses": dict(server.counters),
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(calls / elapsed, 2) if elapsed else None,
+        "round_ms": {
+            "mean": round(1000 * sum(round_times) / len(round_times), 2),
+            "max": round(1000 * max(round_times), 2),
+        },
+        "latency": total.summary() if total else {},
+        "ttfb": ttfb.summary() if ttfb else {},
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    """Lista de regresiones de p95 o throughput respecto a un resultado anterior."""
+    def key(s: dict[str, Any]) -> tuple[int, int]:
+        return (s["assets"], s["concurrency"])
+
+    previous = {key(s): s for s in baseline.get("scenarios", [])}
+    problems = []
+    for scenario in results["scenarios"]:
+        old = previous.get(key(scenario))
+        if old is None:
+            continue
+        label = f"assets={scenario['assets']} concurrency={scenario['concurrency']}"
+        new_p95, old_p95 = scenario["latency"].get("p95_ms"), old["latency"].get("p95_ms")
+        if new_p95 and old_p95 and new_p95 > old_p95 * (1 + max_regression):
+            problems.append(f"{label}: p95 {old_p95} ms -> {new_p95} ms")
+        new_rps, old_rps = scenario["throughput_rps"], old["throughput_rps"]
+        if new_rps and old_rps and new_rps < old_rps * (1 - max_regression):
+            problems.append(f"{label}: throughput {old_rps} -> {new_rps} req/s")
+    return problems
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark de SentinelClient")
+    parser.add_argument("--assets", type=_int_list, default=[1, 10, 50])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--shape", choices=SHAPES, default="powerProduction")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--client-timeout", type=float, default=2.0,
+                        help="Timeout por intento del cliente (s); el de producción es 20 s")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Fichero JSON de salida (por defecto, stdout)")
+    parser.add_argument("--baseline", help="Resultado anterior con el que comparar")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    args = _parse_args(argv)
+    # Timeout corto para que los timeouts inyectados no alarguen el benchmark
+    api.TIMEOUT = aiohttp.ClientTimeout(total=args.client_timeout)
+    server = MockSentinelServer(
+        MockConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            shape=args.shape,
+            rate_limit_rate=args.rate_limit_rate,
+            error_rate=args.error_rate,
+            timeout_rate=args.timeout_rate,
+            timeout_delay=args.client_timeout * 2,
+            retry_after=0.2,
+            seed=args.seed,
+        )
+    )
+    base_url = await server.start()
+    try:
+        scenarios = []
+        for assets in args.assets:
+            for concurrency in args.concurrency:
+                scenarios.append(
+                    await run_scenario(base_url, server, assets, concurrency, args.rounds)
+                )
+    finally:
+        await server.stop()
+
+    results = {
+        "benchmark": "sentinel_client",
+        "python": platform.python_version(),
+        "aiohttp": aiohttp.__version__,
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "scenarios": scenarios,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            problems = compare(results, json.load(handle), args.max_regression)
+        for problem in problems:
+            print(f"REGRESIÓN: {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,235 @@
+"""Servidor aiohttp que imita los endpoints de Sentinel Solar usados por la integración.
+
+Permite fijar la latencia, la forma del payload, la proporción de respuestas
+429, 5xx y timeouts y una cuota por token con cabeceras ``RateLimit-*``. Se puede usar desde los benchmarks o de forma independiente:
+
+    python -m benchmarks.mock_server --port 8080 --latency 0.05 --shape data.power
+"""
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+import argparse
+import asyncio
+import math
+import time
+import random
+import zlib
+
+from aiohttp import web
+
+SHAPES = ("powerProduction", "data.power", "number")
+
+
+@dataclass
+class MockConfig:
+    """Comportamiento del servidor simulado."""
+
+    latency: float = 0.05  # Segundos de latencia base por petición
+    jitter: float = 0.0  # Variación aleatoria (uniforme, ± segundos)
+    shape: str = "powerProduction"
+    rate_limit_rate: float = 0.0  # Proporción de respuestas 429 (con Retry-After)
+    error_rate: float = 0.0  # Proporción de respuestas 5xx
+    timeout_rate: float = 0.0  # Proporción de peticiones que no responden a tiempo
+    timeout_delay: float = 30.0  # Segundos que tarda una petición "colgada"
+    retry_after: float = 1.0
+    quota: int = 0  # Peticiones por token y ventana (0 = sin cuota)
+    quota_window: int = 60  # Segundos de la ventana de la cuota
+    publish_period: int = 300  # Cada cuántos segundos cambia el "time" publicado
+    peak_kw: float = 100.0
+    seed: Optional[int] = None
+
+
+@dataclass
+class MockSentinelServer:
+    """Servidor simulado con contadores de peticiones por tipo de respuesta."""
+
+    config: MockConfig = field(default_factory=MockConfig)
+    counters: Counter = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.config.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self._quota_used: Counter = Counter()  # (token, ventana) -> peticiones
+        self.base_url = ""
+
+    # -------------------- ciclo de vida --------------------
+
+    @web.middleware
+    async def _quota_middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        """Aplica la cuota por token en ventanas fijas y anuncia lo que queda."""
+        cfg = self.config
+        if cfg.quota <= 0:
+            return await handler(request)
+        now = time.time()
+        window = int(now // cfg.quota_window)
+        key = (request.headers.get("X-AUTH-TOKEN", ""), window)
+        self._quota_used[key] += 1
+        remaining = cfg.quota - self._quota_used[key]
+        headers = {
+            "RateLimit-Limit": str(cfg.quota),
+            "RateLimit-Remaining": str(max(remaining, 0)),
+            "RateLimit-Reset": str(max(1, round((window + 1) * cfg.quota_window - now))),
+            "RateLimit-Policy": f"{cfg.quota};w={cfg.quota_window}",
+        }
+        if remaining < 0:
+            self.counters["quota_429"] += 1
+            return web.Response(status=429, headers={**headers, "Retry-After": headers["RateLimit-Reset"]})
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._quota_middleware])
+        app.router.add_get("/api/asset/{asset_id}", self._handle_asset)
+        app.router.add_get("/api/asset/{asset_id}/power-data/instant", self._handle_instant)
+        app.router.add_get("/api/asset/{asset_id}/power-data", self._handle_history)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]  # port=0 elige uno libre
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # -------------------- simulación --------------------
+
+    def _published_time(self, now: Optional[datetime] = None) -> datetime:
+        now = now or datetime.now(timezone.utc)
+        epoch = int(now.timestamp())
+        return datetime.fromtimestamp(epoch - epoch % self.config.publish_period, timezone.utc)
+
+    def _power_w(self, asset_id: str, at: datetime) -> float:
+        """Curva solar aproximada con una pequeña variación por asset."""
+        hour = at.hour + at.minute / 60
+        base = max(0.0, math.sin(math.pi * (hour - 6) / 12)) if 6 <= hour <= 18 else 0.0
+        scale = 0.5 + (zlib.crc32(asset_id.encode()) % 100) / 100
+        return round(self.config.peak_kw * 1000 * base * scale, 1)
+
+    def _payload(self, asset_id: str, at: datetime) -> Any:
+        power_w = self._power_w(asset_id, at)
+        ts = at.isoformat().replace("+00:00", "Z")
+        if self.config.shape == "number":
+            return power_w
+        if self.config.shape == "data.power":
+            return {"data": {"power": power_w}, "timestamp": ts}
+        return {"powerProduction": power_w / 1000, "time": ts}
+
+    async def _simulate(self) -> Optional[web.Response]:
+        """Aplica latencia y errores inyectados; devuelve la respuesta de error si toca."""
+        cfg = self.config
+        delay = cfg.latency + (self._random.uniform(-cfg.jitter, cfg.jitter) if cfg.jitter else 0.0)
+        roll = self._random.random()
+        if roll < cfg.timeout_rate:
+            self.counters["timeout"] += 1
+            await asyncio.sleep(cfg.timeout_delay)
+            return web.Response(status=504)
+        roll -= cfg.timeout_rate
+        await asyncio.sleep(max(delay, 0.0))
+        if roll < cfg.rate_limit_rate:
+            self.counters["429"] += 1
+            return web.Response(status=429, headers={"Retry-After": str(cfg.retry_after)})
+        roll -= cfg.rate_limit_rate
+        if roll < cfg.error_rate:
+            self.counters["5xx"] += 1
+            return web.Response(status=self._random.choice((500, 502, 503)))
+        self.counters["ok"] += 1
+        return None
+
+    # -------------------- handlers --------------------
+
+    async def _handle_asset(self, request: web.Request) -> web.Response:
+        self.counters["asset"] += 1
+        if (error := await self._simulate()) is not None:
+            return error
+        asset_id = request.match_info["asset_id"]
+        return web.json_response(
+            {"name": f"Asset {asset_id}", "type": "PV", "shareFactor": 1.0},
+            headers={"ETag": f'"{asset_id}-v1"'},
+        )
+
+    async def _handle_instant(self, request: web.Request) -> web.Response:
+        self.counters["instant"] += 1
+        if (error := await self._simulate()) is not None:
+            return error
+        asset_id = request.match_info["asset_id"]
+        return web.json_response(self._payload(asset_id, self._published_time()))
+
+    async def _handle_history(self, request: web.Request) -> web.Response:
+        self.counters["history"] += 1
+        if (error := await self._simulate()) is not None:
+            return error
+        asset_id = request.match_info["asset_id"]
+        try:
+            start = datetime.fromisoformat(request.query["from"].replace("Z", "+00:00"))
+            end = datetime.fromisoformat(request.query["to"].replace("Z", "+00:00"))
+        except (KeyError, ValueError):
+            return web.Response(status=400)
+        step = timedelta(seconds=self.config.publish_period)
+        points = []
+        at = self._published_time(start)
+        while at <= end:
+            if at >= start:
+                power_w = self._power_w(asset_id, at)
+                points.append({"power": power_w, "time": at.isoformat().replace("+00:00", "Z")})
+            at += step
+        return web.json_response({"data": points})
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Servidor simulado de la API de Sentinel Solar")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--shape", choices=SHAPES, default="powerProduction")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-delay", type=float, default=30.0)
+    parser.add_argument("--publish-period", type=int, default=300)
+    parser.add_argument("--quota", type=int, default=0, help="Peticiones por token y ventana (0 = sin cuota)")
+    parser.add_argument("--quota-window", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        shape=args.shape,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_delay=args.timeout_delay,
+        publish_period=args.publish_period,
+        quota=args.quota,
+        quota_window=args.quota_window,
+        seed=args.seed,
+    )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = MockSentinelServer(config_from_args(args))
+    print(f"Servidor simulado en {await server.start(args.host, args.port)}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_serve(_parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,306 @@
+"""Prueba de escala: cientos de entradas de sentinel_solar en una sola instancia de HA.
+
+Levanta Home Assistant con ``async_test_home_assistant`` (de
+``pytest-homeassistant-custom-component``), crea N entradas contra el servidor
+simulado y hace varias rondas de actualización de sus coordinadores. Mientras
+tanto mide:
+
+- el retraso del bucle de eventos (p50/p95/p99/máx.);
+- el tiempo de arranque de todas las entradas;
+- el RSS máximo y la memoria por entidad (RSS, o ``tracemalloc`` si se pide);
+- la tasa de escrituras de estado (eventos ``state_changed`` por segundo).
+
+    python -m benchmarks.scale_harness --entries 10,100,300 --rounds 3 --output scale.json
+"""
+from __future__ import annotations
+from typing import Any, Optional
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from homeassistant.core import Event, HomeAssistant, callback  # Antes que loader (import circular)
+from homeassistant import loader
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import EVENT_STATE_CHANGED, __version__ as HA_VERSION
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.sentinel_solar.const import (
+    DOMAIN, CONF_TOKEN, CONF_ASSET_GENERAL, CONF_BASE_URL, CONF_ASSETS,
+    CONF_SHARE_FACTOR, CONF_UPDATE_MINUTES,
+)
+from .mock_server import MockConfig, MockSentinelServer
+
+LAG_INTERVAL = 0.01  # Periodo del muestreo del bucle (s)
+
+
+class LoopLagMonitor:
+    """Mide cuánto tarda el bucle en despertar respecto a lo programado."""
+
+    def __init__(self, interval: float = LAG_INTERVAL) -> None:
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.samples: list[float] = []
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def reset(self) -> None:
+        self.samples.clear()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self._interval
+            await asyncio.sleep(self._interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def summary(self) -> dict[str, Any]:
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+
+        def pct(p: float) -> float:
+            return round(1000 * ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+        return {
+            "count": len(ordered),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(1000 * ordered[-1], 2),
+        }
+
+
+def _rss_bytes() -> int:
+    """RSS actual del proceso (Linux); 0 si no está disponible."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _preload_platforms() -> None:
+    import custom_components.sentinel_solar.number  # noqa: F401
+    import custom_components.sentinel_solar.sensor  # noqa: F401
+    import homeassistant.components.number  # noqa: F401
+    import homeassistant.components.sensor  # noqa: F401
+
+
+def _make_entries(
+    entries: int, assets_per_entry: int, base_url: str, shared_token: bool
+) -> list[MockConfigEntry]:
+    result = []
+    for i in range(entries):
+        extra = [f"entry{i}-asset{j}" for j in range(1, assets_per_entry)]
+        result.append(
+            MockConfigEntry(
+                domain=DOMAIN,
+                title=f"Sentinel {i}",
+                data={
+                    CONF_TOKEN: "shared-token" if shared_token else f"token-{i}",
+                    CONF_ASSET_GENERAL: f"entry{i}-asset0",
+                    CONF_BASE_URL: base_url,
+                },
+                options={
+                    CONF_UPDATE_MINUTES: 60,
+                    CONF_SHARE_FACTOR: 0.025,
+                    CONF_ASSETS: ",".join(extra),
+                },
+            )
+        )
+    return result
+
+
+async def _drive(coordinators: list, spread: float) -> None:
+    """Actualiza todos los coordinadores, a la vez o repartidos en ``spread`` s."""
+    if spread <= 0 or len(coordinators) < 2:
+        await asyncio.gather(*(c.async_refresh() for c in coordinators))
+        return
+    step = spread / len(coordinators)
+
+    async def delayed(index: int, coordinator) -> None:
+        await asyncio.sleep(index * step)
+        await coordinator.async_refresh()
+
+    await asyncio.gather(*(delayed(i, c) for i, c in enumerate(coordinators)))
+
+
+async def run_scale(
+    server: MockSentinelServer,
+    base_url: str,
+    entries: int,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    """Arranca una instancia de HA con ``entries`` entradas y la mide."""
+    server.counters.clear()
+    monitor = LoopLagMonitor()
+    state_writes = 0
+
+    @callback
+    def _count_state(event: Event) -> None:
+        nonlocal state_writes
+        state_writes += 1
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        async with async_test_home_assistant(storage_dir=storage_dir) as hass:
+            hass: HomeAssistant
+            # Permitir cargar custom_components/ desde el directorio actual
+            hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+            hass.bus.async_listen(EVENT_STATE_CHANGED, _count_state)
+            monitor.start()
+
+            config_entries = _make_entries(
+                entries, args.assets_per_entry, base_url, args.shared_token
+            )
+            for entry in config_entries:
+                entry.add_to_hass(hass)
+
+            # Importar antes las plataformas para no contar su código como memoria por entidad
+            await hass.async_add_executor_job(_preload_platforms)
+            if args.trace_memory:
+                tracemalloc.start()
+            rss_before = _rss_bytes()
+            traced_before = tracemalloc.get_traced_memory()[0] if args.trace_memory else 0
+
+            started = time.perf_counter()
+            assert await async_setup_component(hass, DOMAIN, {})
+            await hass.async_block_till_done()
+            setup_s = time.perf_counter() - started
+            setup_lag = monitor.summary()
+
+            entity_count = len(hass.states.async_entity_ids(("sensor", "number")))
+            memory = {"rss_delta_bytes": _rss_bytes() - rss_before}
+            if args.trace_memory:
+                memory["traced_delta_bytes"] = tracemalloc.get_traced_memory()[0] - traced_before
+                tracemalloc.stop()
+            key = "traced_delta_bytes" if args.trace_memory else "rss_delta_bytes"
+            memory["per_entity_bytes"] = round(memory[key] / entity_count) if entity_count else None
+            memory["per_entry_bytes"] = round(memory[key] / entries) if entries else None
+
+            coordinators = [
+                hass.data[DOMAIN][e.entry_id]["coordinator"]
+                for e in config_entries
+                if e.entry_id in hass.data.get(DOMAIN, {})
+            ]
+
+            # Rondas de actualización en régimen estable
+            monitor.reset()
+            writes_before = state_writes
+            requests_before = server.counters["instant"]
+            drive_started = time.perf_counter()
+            round_times = []
+            for _ in range(args.rounds):
+                round_start = time.perf_counter()
+                await _drive(coordinators, args.spread)
+                await hass.async_block_till_done()
+                round_times.append(time.perf_counter() - round_start)
+            drive_s = time.perf_counter() - drive_started
+            writes = state_writes - writes_before
+
+            result = {
+                "entries": entries,
+                "assets_per_entry": args.assets_per_entry,
+                "entries_loaded": sum(e.state is ConfigEntryState.LOADED for e in config_entries),
+                "entities": entity_count,
+                "setup_s": round(setup_s, 3),
+                "setup_loop_lag": setup_lag,
+                "rounds": args.rounds,
+                "round_s": {
+                    "mean": round(sum(round_times) / len(round_times), 3) if round_times else None,
+                    "max": round(max(round_times), 3) if round_times else None,
+                },
+                "loop_lag": monitor.summary(),
+                "state_writes": writes,
+                "state_writes_per_s": round(writes / drive_s, 1) if drive_s else None,
+                "state_writes_per_round": round(writes / args.rounds, 1) if args.rounds else None,
+                "api_requests": server.counters["instant"] - requests_before,
+                "memory": memory,
+                "peak_rss_bytes": _peak_rss_bytes(),
+            }
+
+            await monitor.stop()
+            # Descargar las entradas para cerrar las sesiones de los clientes
+            for entry in config_entries:
+                await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_stop(force=True)
+    return result
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Prueba de escala de sentinel_solar en Home Assistant")
+    parser.add_argument("--entries", type=_int_list, default=[10, 100])
+    parser.add_argument("--assets-per-entry", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--spread", type=float, default=0.0,
+                        help="Repartir cada ronda en estos segundos (0 = todas a la vez)")
+    parser.add_argument("--shared-token", action="store_true",
+                        help="Todas las entradas comparten token (y por tanto cliente)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Memoria por entidad con tracemalloc (más precisa, más lenta)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Fichero JSON de salida (por defecto, stdout)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    args = _parse_args(argv)
+    server = MockSentinelServer(
+        MockConfig(latency=args.latency, jitter=args.jitter, seed=args.seed)
+    )
+    base_url = await server.start()
+    try:
+        scenarios = [
+            await run_scale(server, base_url, entries, args) for entries in args.entries
+        ]
+    finally:
+        await server.stop()
+
+    results = {
+        "benchmark": "scale_harness",
+        "python": platform.python_version(),
+        "home_assistant": HA_VERSION,
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "scenarios": scenarios,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
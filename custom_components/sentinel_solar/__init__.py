@@ -1,25 +1,61 @@
 from __future__ import annotations
 from datetime import timedelta
+from functools import partial
 import logging
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import aiohttp_client
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_call_later
 
 from .const import (
     DOMAIN, CONF_TOKEN, CONF_ASSET_GENERAL,
-    CONF_BASE_URL, CONF_UPDATE_MINUTES, CONF_SHARE_FACTOR,
-    DEFAULT_BASE_URL, DEFAULT_UPDATE_MINUTES, DEFAULT_SHARE_FACTOR
+    CONF_BASE_URL, CONF_UPDATE_MINUTES, CONF_SHARE_FACTOR, CONF_ASSETS,
+    CONF_ADAPTIVE_POLLING, CONF_DAILY_REQUEST_BUDGET, CONF_MAX_STALENESS, CONF_FAST_START,
+    CONF_INTEGRATION_METHOD, CONF_POWER_DEADBAND, CONF_ENERGY_DEADBAND, CONF_MIN_WRITE_INTERVAL,
+    CONF_NOWCAST,
+    DEFAULT_BASE_URL, DEFAULT_UPDATE_MINUTES, DEFAULT_SHARE_FACTOR,
+    DEFAULT_ADAPTIVE_POLLING, DEFAULT_DAILY_REQUEST_BUDGET, DEFAULT_MAX_STALENESS,
+    DEFAULT_FAST_START, DEFAULT_INTEGRATION_METHOD, DEFAULT_POWER_DEADBAND,
+    DEFAULT_ENERGY_DEADBAND, DEFAULT_MIN_WRITE_INTERVAL, DEFAULT_NOWCAST
 )
-from .api import SentinelClient
+from .api import SentinelClient, extract_share_factor
+from .asset_cache import AssetInfoCache, async_get_asset_cache
+from .ledger import async_get_energy_ledger
+from .registry import async_get_registry
+from .coordinator import SentinelCoordinator, parse_asset_ids
+from .scheduler import AdaptivePollScheduler
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS: list[str] = ["sensor", "number"]
 
+# Arranque rápido: la primera consulta se retrasa y se reparte entre entradas
+FIRST_REFRESH_DELAY = 5  # s
+FIRST_REFRESH_STAGGER = 2  # s entre entradas consecutivas
+FIRST_REFRESH_WINDOW = 120  # s; las entradas se reparten de forma cíclica en esta ventana
+
+# Opciones que se aplican en caliente sobre el coordinador; el resto recarga la entrada
+LIVE_OPTIONS = frozenset({CONF_SHARE_FACTOR, CONF_UPDATE_MINUTES, CONF_MAX_STALENESS, CONF_FAST_START})
+# Valor que aplica la integración cuando falta cada opción. El flujo de opciones
+# guarda todas las claves, así que una clave ausente y su valor por defecto son lo mismo
+OPTION_DEFAULTS = {
+    CONF_UPDATE_MINUTES: DEFAULT_UPDATE_MINUTES,
+    CONF_SHARE_FACTOR: DEFAULT_SHARE_FACTOR,
+    CONF_ASSETS: [],
+    CONF_INTEGRATION_METHOD: DEFAULT_INTEGRATION_METHOD,
+    CONF_ADAPTIVE_POLLING: DEFAULT_ADAPTIVE_POLLING,
+    CONF_DAILY_REQUEST_BUDGET: DEFAULT_DAILY_REQUEST_BUDGET,
+    CONF_POWER_DEADBAND: DEFAULT_POWER_DEADBAND,
+    CONF_ENERGY_DEADBAND: DEFAULT_ENERGY_DEADBAND,
+    CONF_MIN_WRITE_INTERVAL: DEFAULT_MIN_WRITE_INTERVAL,
+    CONF_NOWCAST: DEFAULT_NOWCAST,
+    CONF_MAX_STALENESS: DEFAULT_MAX_STALENESS,
+    CONF_FAST_START: DEFAULT_FAST_START,
+}
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Configurar la integración cuando se carga una entrada de configuración."""
-    session = aiohttp_client.async_get_clientsession(hass)
     base_url = entry.data.get(CONF_BASE_URL, DEFAULT_BASE_URL)
     token = entry.data[CONF_TOKEN]
     asset_general = entry.data[CONF_ASSET_GENERAL]
@@ -27,69 +63,183 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Obtener opciones de configuración
     update_minutes = entry.options.get(CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES)
     share_factor = entry.options.get(CONF_SHARE_FACTOR)
+    extra_assets = parse_asset_ids(entry.options.get(CONF_ASSETS))
     
-    client = SentinelClient(session, base_url, token)
+    # Cliente compartido con otras entradas que usen la misma URL y token
+    registry = async_get_registry(hass)
+    client = registry.async_acquire(base_url, token)
+    entry.async_on_unload(partial(registry.async_release, base_url, token))
     
-    # Obtener y cachear información del asset
-    asset_info = {}
-    try:
-        asset_info = await client.fetch_asset_info(asset_general)
-        asset_name = asset_info.get("name") or asset_info.get("assetName") or asset_general
-        _LOGGER.info("Información del asset obtenida: %s", asset_name)
-    except Exception as e:
-        _LOGGER.warning("No se pudo obtener información del asset: %s", e)
+    # Información del asset: copia en disco si existe; si no, una única consulta
+    asset_cache = await async_get_asset_cache(hass)
+    asset_info = asset_cache.get(asset_general)
+    if asset_info is None:
+        asset_info = await asset_cache.async_refresh(client, asset_general) or {}
+        if asset_info:
+            asset_name = asset_info.get("name") or asset_info.get("assetName") or asset_general
+            _LOGGER.info("Información del asset obtenida: %s", asset_name)
+        else:
+            _LOGGER.warning("No se pudo obtener información del asset %s", asset_general)
+    elif asset_cache.is_stale(asset_general):
+        # Revalidar en segundo plano sin retrasar el arranque
+        hass.async_create_task(
+            _async_revalidate_asset_info(hass, entry, client, asset_cache, asset_general)
+        )
+    if not asset_info:
         asset_info = {"name": asset_general}
     
-    # Intentar obtener el share_factor desde la API si no está configurado
+    # El share_factor sale de la misma información del asset (sin otra petición)
     if share_factor is None:
-        try:
-            api_share_factor = await client.get_share_factor(asset_general)
-            if api_share_factor is not None:
-                # Actualizar las opciones con el share_factor obtenido de la API
-                new_options = dict(entry.options)
-                new_options[CONF_SHARE_FACTOR] = api_share_factor
-                hass.config_entries.async_update_entry(entry, options=new_options)
-                share_factor = api_share_factor
-                _LOGGER.info("Share factor obtenido desde la API: %s", share_factor)
-            else:
-                share_factor = DEFAULT_SHARE_FACTOR
-                _LOGGER.warning("No se pudo obtener el share_factor desde la API, usando valor por defecto: %s", share_factor)
-        except Exception as e:
-            _LOGGER.warning("Error al obtener share_factor desde la API: %s. Usando valor por defecto.", e)
+        api_share_factor = extract_share_factor(asset_info)
+        if api_share_factor is not None:
+            # Actualizar las opciones con el share_factor obtenido de la API
+            new_options = dict(entry.options)
+            new_options[CONF_SHARE_FACTOR] = api_share_factor
+            hass.config_entries.async_update_entry(entry, options=new_options)
+            share_factor = api_share_factor
+            _LOGGER.info("Share factor obtenido desde la API: %s", share_factor)
+        else:
             share_factor = DEFAULT_SHARE_FACTOR
+            _LOGGER.warning("No se pudo obtener el share_factor desde la API, usando valor por defecto: %s", share_factor)
     else:
         share_factor = float(share_factor)
 
-    async def _async_update():
-        try:
-            general = await client.fetch_power_instant(asset_general)
-            return {"general": general}
-        except Exception as e:
-            raise UpdateFailed(str(e)) from e
+    # Sondeo adaptativo (sol, variabilidad y presupuesto diario) si está activado
+    scheduler = None
+    if entry.options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING):
+        scheduler = AdaptivePollScheduler(
+            hass,
+            timedelta(minutes=update_minutes),
+            int(entry.options.get(CONF_DAILY_REQUEST_BUDGET, DEFAULT_DAILY_REQUEST_BUDGET)),
+        )
 
-    coordinator = DataUpdateCoordinator(
+    # Un único coordinador consulta en paralelo el asset principal y los adicionales
+    coordinator = SentinelCoordinator(
         hass,
-        _LOGGER,
-        name="sentinel_solar_coordinator",
-        update_method=_async_update,
-        update_interval=timedelta(minutes=update_minutes),
+        client,
+        asset_general,
+        extra_assets=extra_assets,
+        update_minutes=update_minutes,
+        scheduler=scheduler,
+        share_factor=share_factor,
+        max_staleness=int(entry.options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)),
+        asset_cache=asset_cache,
     )
-    await coordinator.async_config_entry_first_refresh()
+    if entry.options.get(CONF_FAST_START, DEFAULT_FAST_START) and coordinator.restore_readings():
+        # Arranque rápido: las entidades parten de la última lectura guardada y la
+        # primera consulta se hace en segundo plano, escalonada entre entradas
+        slot = len(hass.data.get(DOMAIN, {}))
+        delay = FIRST_REFRESH_DELAY + (slot * FIRST_REFRESH_STAGGER) % FIRST_REFRESH_WINDOW
+
+        @callback
+        def _async_first_refresh(_now) -> None:
+            hass.async_create_task(coordinator.async_refresh())
+
+        entry.async_on_unload(async_call_later(hass, delay, _async_first_refresh))
+        _LOGGER.debug("Arranque rápido de %s; primera consulta en %d s", asset_general, delay)
+    else:
+        await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
         "client": client,
         "coordinator": coordinator,
         "asset_general": asset_general,
         "asset_info": asset_info,  # Cachear información del asset
+        # Un único DeviceInfo por entrada, compartido por todas sus entidades
+        "device_info": build_device_info(entry, asset_info),
+        # Configuración aplicada, para saber qué cambia al actualizar la entrada
+        "entry_data": dict(entry.data),
+        "options": dict(entry.options),
     }
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Recargar la entrada cuando se actualizan las opciones."""
-    await hass.config_entries.async_reload(entry.entry_id)
+def build_device_info(entry: ConfigEntry, asset_info: dict) -> DeviceInfo:
+    """Construye la información del dispositivo de la entrada a partir del asset."""
+    asset_name = asset_info.get("name") or asset_info.get("assetName") or entry.data.get(CONF_ASSET_GENERAL, "sentinel_solar")
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=asset_name,
+        manufacturer="sentinel_solar (proyecto no oficial de Sentinel Solar)",
+        model=asset_info.get("type") or asset_info.get("assetType") or "Asset",
+        sw_version=asset_info.get("firmwareVersion") or asset_info.get("firmware_version"),
+        configuration_url=f"{entry.data.get(CONF_BASE_URL, DEFAULT_BASE_URL)}",
+    )
+
+async def _async_revalidate_asset_info(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    client: SentinelClient,
+    asset_cache: AssetInfoCache,
+    asset_general: str,
+) -> None:
+    """Refresca la información del asset y actualiza el dispositivo si ha cambiado."""
+    asset_info = await asset_cache.async_refresh(client, asset_general)
+    data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if not asset_info or data is None or asset_info == data.get("asset_info"):
+        return
+    data["asset_info"] = asset_info
+    device_info = data["device_info"] = build_device_info(entry, asset_info)
+
+    device_registry = dr.async_get(hass)
+    device = device_registry.async_get_device(identifiers={(DOMAIN, entry.entry_id)})
+    if device is not None:
+        device_registry.async_update_device(
+            device.id,
+            name=device_info["name"],
+            model=device_info["model"],
+            sw_version=device_info["sw_version"],
+        )
+    _LOGGER.debug("Información del asset %s revalidada", asset_general)
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Aplicar los cambios de la entrada.
+
+    El factor de participación, el intervalo y la antigüedad máxima se aplican
+    sobre el coordinador en marcha, sin consultar la API ni dejar las entidades
+    no disponibles. La entrada sólo se recarga si cambian la URL, el token o el
+    asset, o una opción que afecta a las entidades creadas.
+    """
+    data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if data is None:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    new_options = dict(entry.options)
+    old_values, new_values = _effective_options(data["options"]), _effective_options(new_options)
+    changed = {
+        key for key in old_values.keys() | new_values.keys()
+        if old_values.get(key) != new_values.get(key)
+    }
+    if dict(entry.data) != data["entry_data"] or not changed <= LIVE_OPTIONS:
+        _LOGGER.debug("Recargando %s: cambios que requieren recrear la entrada", entry.title)
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    data["options"] = new_options
+    coordinator: SentinelCoordinator = data["coordinator"]
+    if CONF_SHARE_FACTOR in changed:
+        share_factor = new_options.get(CONF_SHARE_FACTOR)
+        coordinator.set_share_factor(
+            DEFAULT_SHARE_FACTOR if share_factor is None else float(share_factor)
+        )
+    if CONF_UPDATE_MINUTES in changed:
+        coordinator.set_update_minutes(
+            int(new_options.get(CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES))
+        )
+    if CONF_MAX_STALENESS in changed:
+        coordinator.max_staleness = timedelta(
+            minutes=int(new_options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS))
+        )
+    if changed:
+        _LOGGER.debug("Opciones aplicadas en caliente en %s: %s", entry.title, ", ".join(sorted(changed)))
+
+def _effective_options(options: dict) -> dict:
+    """Opciones con los valores por defecto aplicados, para compararlas entre sí."""
+    values = {**OPTION_DEFAULTS, **{key: value for key, value in options.items() if value is not None}}
+    values[CONF_ASSETS] = parse_asset_ids(values[CONF_ASSETS])
+    return values
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Descargar la integración cuando se elimina."""
@@ -98,3 +248,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Borrar los puntos de control de energía de una entrada eliminada."""
+    ledger = await async_get_energy_ledger(hass)
+    ledger.async_remove_prefix(entry.entry_id)
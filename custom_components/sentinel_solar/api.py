@@ -1,100 +1,420 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional, Union
-from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, urlparse
 import asyncio
 import aiohttp
 import logging
+import random
 import time
 
+try:
+    # El mismo decodificador rápido que usa Home Assistant (json_loads), sin depender de HA
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+from .budget import BudgetExhaustedError, RateBudget, parse_reset
+from .circuit import CircuitBreaker, CircuitOpenError
+from .metrics import PHASE_BODY, PHASE_DECODE, PHASE_TOTAL, RequestTimings, endpoint_key
+
 _LOGGER = logging.getLogger(__name__)
 
 TIMEOUT = aiohttp.ClientTimeout(total=20)
 MAX_RETRIES = 3
+MAX_CONCURRENT_REQUESTS = 4  # Peticiones simultáneas máximas contra el mismo host
 RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
 MAX_POWER_KW = 10000  # 10 MW máximo razonable
 MIN_POWER_W = -100000  # Permitir consumo negativo hasta -100kW
+CALL_DEADLINE = 60  # Segundos máximos por llamada, incluyendo reintentos y esperas
+BACKOFF_BASE = 1.0  # Primera espera del backoff exponencial (s)
+BACKOFF_MAX = 30.0  # Espera máxima entre reintentos sin Retry-After (s)
+RETRY_AFTER_MAX = 300.0  # No aceptar Retry-After absurdamente largos (s)
+BUDGET_WAIT_MAX = 5.0  # Espera máxima por cuota dentro de una llamada; si es más, se falla (s)
+HISTORY_PAGE = timedelta(hours=24)  # Tramo máximo pedido en cada página de histórico
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Interpreta ``Retry-After`` o las cabeceras de rate limit y devuelve segundos de espera."""
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            seconds = float(value)
+        except ValueError:
+            # Formato fecha HTTP: "Wed, 21 Oct 2015 07:28:00 GMT"
+            try:
+                retry_at = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                retry_at = None
+            if retry_at is None:
+                return None
+            if retry_at.tzinfo is None:
+                retry_at = retry_at.replace(tzinfo=timezone.utc)
+            seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+        return min(max(seconds, 0.0), RETRY_AFTER_MAX)
+
+    seconds = parse_reset(headers)
+    return min(seconds, RETRY_AFTER_MAX) if seconds is not None else None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Calcula la espera antes del siguiente intento (backoff exponencial con jitter)."""
+    if retry_after is not None:
+        # Respetar lo que pide el servidor, con un pequeño jitter para no sincronizar clientes
+        return retry_after + random.uniform(0, 1)
+    cap = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(cap / 2, cap)
+
+
+@dataclass(frozen=True, slots=True)
+class PowerSample:
+    """Lectura de potencia ya validada, con el timestamp de la API parseado a UTC."""
+
+    power: float  # Vatios, sin aplicar el factor de participación
+    timestamp: Optional[datetime]  # UTC; None si la API no lo envía o no es válido
+    raw_timestamp: Optional[str]  # Texto original, para atributos y depuración
+    source: str  # Clave del payload de la que salió la potencia (p. ej. "data.power")
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Convierte un timestamp ISO 8601 de la API a ``datetime`` UTC (``None`` si no es válido)."""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        # Sin zona horaria: la API trabaja en UTC
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def extract_share_factor(asset_info: Any) -> Optional[float]:
+    """Busca el share_factor en los distintos campos posibles de la información del asset."""
+    if not isinstance(asset_info, dict):
+        return None
+    for key in ("shareFactor", "share_factor", "participationFactor", "participation_factor"):
+        if key in asset_info:
+            try:
+                return float(asset_info[key])
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def is_host_failure(error: BaseException) -> bool:
+    """Indica si el error apunta a que la API no está disponible (y cuenta para el circuito)."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUS_CODES
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, OSError)) and not isinstance(
+        error, (PermissionError, FileNotFoundError)
+    )
+
+
+def _clamp_power(power: float) -> float:
+    """Limita la potencia (W) a un rango razonable avisando de los valores anormales."""
+    max_power_w = MAX_POWER_KW * 1000
+    if power > max_power_w:
+        _LOGGER.warning(
+            "Potencia muy alta detectada: %.2f W (máx esperado: %.2f W). Limitando valor.",
+            power, max_power_w
+        )
+        return max_power_w
+    if power < MIN_POWER_W:
+        _LOGGER.warning(
+            "Potencia muy baja detectada: %.2f W (mín esperado: %.2f W). Limitando valor.",
+            power, MIN_POWER_W
+        )
+        return MIN_POWER_W
+    return power
+
+
+# Claves de potencia por orden de preferencia con su escala a W (powerProduction viene en kW)
+POWER_KEYS = (("powerProduction", 1000.0), ("power", 1.0), ("activePower", 1.0))
+TIMESTAMP_KEYS = ("time", "timestamp", "ts", "updatedAt")
+
+
+@dataclass(frozen=True, slots=True)
+class PayloadShape:
+    """Formato de una respuesta de potencia: dónde están la potencia y el timestamp."""
+
+    container: Optional[str]  # "data" si la potencia va anidada; None si está en la raíz
+    power_key: Optional[str]  # None si el payload es directamente un número
+    scale: float  # Factor para pasar el valor a W
+    ts_key: Optional[str]  # Clave del timestamp en la raíz, si la hay
+    source: str  # Ruta de la potencia, p. ej. "data.power"
+
+    @property
+    def learnable(self) -> bool:
+        """Sólo merece la pena recordar formatos en los que se encontró la potencia."""
+        return self.source != "none"
+
+    def read(self, payload: Any) -> Optional[Tuple[float, Any]]:
+        """Aplica el formato y devuelve ``(W, timestamp)``; ``None`` si el payload no encaja."""
+        if self.power_key is None:
+            if self.source == "value" and isinstance(payload, (int, float)):
+                return float(payload) * self.scale, None
+            if self.source == "none" and isinstance(payload, dict):
+                return 0.0, payload.get(self.ts_key) if self.ts_key else None
+            return None
+        try:
+            container = payload[self.container] if self.container else payload
+            value = container[self.power_key]
+            ts = payload[self.ts_key] if self.ts_key else None
+        except (KeyError, TypeError, IndexError):
+            return None
+        if value is None and self.power_key == "powerProduction":
+            return None
+        return float(value) * self.scale, ts
+
+
+VALUE_SHAPE = PayloadShape(None, None, 1.0, None, "value")
+
+
+def detect_payload_shape(payload: Any) -> Optional[PayloadShape]:
+    """Recorre las claves conocidas y devuelve el formato del payload (``None`` si no es válido)."""
+    if isinstance(payload, (int, float)):
+        return VALUE_SHAPE
+    if not isinstance(payload, dict):
+        return None
+
+    ts_key = next((key for key in TIMESTAMP_KEYS if key in payload), None)
+    containers: Tuple[Tuple[Optional[str], Mapping[str, Any]], ...] = ((None, payload),)
+    if isinstance(payload.get("data"), dict):
+        containers += (("data", payload["data"]),)
+    for container, values in containers:
+        for key, scale in POWER_KEYS:
+            # powerProduction puede venir a null; el resto de claves cuentan si existen
+            if key in values and (key != "powerProduction" or values[key] is not None):
+                source = f"{container}.{key}" if container else key
+                return PayloadShape(container, key, scale, ts_key, source)
+    return PayloadShape(None, None, 1.0, ts_key, "none")
+
 
 class SentinelClient:
-    def __init__(self, session: aiohttp.ClientSession, base_url: str, token: str) -> None:
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        base_url: str,
+        token: str,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        timings: Optional[RequestTimings] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        budget: Optional[RateBudget] = None,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> None:
         self._session = session
         self._base_url = base_url.rstrip("/")
-        self._headers = {"X-AUTH-TOKEN": token, "Accept": "application/json"}
-        self._lock = asyncio.Lock()
+        self._headers = {
+            "X-AUTH-TOKEN": token,
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        }
+        # Límite de peticiones concurrentes contra el host (sustituye al lock que las
+        # serializaba). El registro comparte uno por host entre clientes de distintos tokens
+        self._semaphore = semaphore or asyncio.Semaphore(max(1, max_concurrency))
+        # Peticiones en vuelo por path, para agrupar llamadas idénticas concurrentes
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Formato aprendido de la respuesta instantánea de cada asset
+        self._shapes: Dict[str, PayloadShape] = {}
+        # Validadores HTTP por path fijo: (ETag, Last-Modified, payload ya parseado)
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str], Any]] = {}
         
+        # Histogramas de latencia por endpoint y fase (los alimenta también el TraceConfig)
+        self.timings = timings or RequestTimings()
+        # Circuit breaker del host (compartido entre clientes del mismo host vía el registro)
+        self.breaker = breaker or CircuitBreaker(urlparse(self._base_url).netloc or self._base_url)
+        # Cuota de peticiones del token (compartida entre clientes del mismo token vía el registro)
+        self.budget = budget or RateBudget(urlparse(self._base_url).netloc or self._base_url)
+
         # Métricas de rendimiento
         self._metrics = {
             "total_requests": 0,
+            "coalesced_requests": 0,
             "successful_requests": 0,
             "failed_requests": 0,
             "total_retries": 0,
+            "not_modified_responses": 0,
+            "shape_detections": 0,
             "avg_response_time": 0.0,
             "last_request_time": None,
         }
 
+    def _request_headers(self, path: str) -> Dict[str, str]:
+        """Cabeceras de la petición, con las condicionales si ya conocemos el recurso."""
+        cached = self._validators.get(path)
+        if cached is None:
+            return self._headers
+        etag, last_modified, _payload = cached
+        headers = dict(self._headers)
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _remember_validators(self, path: str, headers: Mapping[str, str], payload: Any) -> None:
+        """Guarda ETag/Last-Modified de la respuesta para la siguiente petición condicional.
+
+        Sólo para paths fijos (instantánea e información del asset): el histórico
+        lleva en la query un rango distinto en cada petición y no se repite, así
+        que guardarlo haría crecer el diccionario durante toda la vida del proceso.
+        """
+        if "?" in path:
+            return
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag or last_modified:
+            self._validators[path] = (etag, last_modified, payload)
+        else:
+            self._validators.pop(path, None)
+
     async def _get_json_with_retry(self, path: str, retries: int = MAX_RETRIES) -> Any:
-        """Obtiene datos JSON de la API con reintentos automáticos y backoff exponencial."""
+        """Obtiene datos JSON de la API con reintentos, backoff con jitter y plazo total.
+
+        El semáforo sólo se mantiene durante la petición HTTP: las esperas entre
+        reintentos se hacen fuera para no bloquear al resto de llamadas. En 503 se
+        respeta ``Retry-After`` (o las cabeceras de rate limit) si la API lo indica.
+        Un 429 no se reintenta: agota el presupuesto del token y falla con
+        ``BudgetExhaustedError`` para no empeorar el exceso de peticiones.
+        """
         url = f"{self._base_url}{path}"
-        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CALL_DEADLINE
+
         for attempt in range(retries):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"Plazo de {CALL_DEADLINE}s agotado para {path}")
+            timeout = aiohttp.ClientTimeout(total=min(TIMEOUT.total, remaining))
+            is_last = attempt >= retries - 1
+            retry_after: Optional[float] = None
+
+            # Sin cuota no se envía nada: sólo se espera si es poco y cabe en el plazo
+            budget_wait = self.budget.wait_time()
+            if budget_wait > 0:
+                if budget_wait > BUDGET_WAIT_MAX or loop.time() + budget_wait >= deadline:
+                    raise BudgetExhaustedError(self.budget.name, budget_wait)
+                await asyncio.sleep(budget_wait)
+
             try:
-                async with self._lock:
-                    async with self._session.get(url, headers=self._headers, timeout=TIMEOUT) as resp:
+                async with self._semaphore:
+                    self.budget.consume()
+                    async with self._session.get(url, headers=self._request_headers(path), timeout=timeout) as resp:
+                        self.budget.observe(resp.headers)
+                        if resp.status == 429:
+                            self.budget.exhausted(parse_retry_after(resp.headers))
+                            raise BudgetExhaustedError(self.budget.name, self.budget.wait_time())
+
+                        # 304: el recurso no ha cambiado, se reutiliza el payload ya parseado
+                        if resp.status == 304 and path in self._validators:
+                            self._metrics["not_modified_responses"] += 1
+                            return self._validators[path][2]
+
                         # Si el código de estado requiere reintento y no es el último intento
-                        if resp.status in RETRY_STATUS_CODES and attempt < retries - 1:
-                            wait_time = 2 ** attempt  # Backoff exponencial: 1s, 2s, 4s...
-                            self._metrics["total_retries"] += 1
-                            _LOGGER.warning(
-                                "Error %s en intento %d/%d para %s. Reintentando en %d segundos...",
-                                resp.status, attempt + 1, retries, path, wait_time
-                            )
-                            await asyncio.sleep(wait_time)
-                            continue
-                        
-                        # Errores que no deben reintentar
-                        if resp.status == 401:
-                            raise PermissionError("Unauthorized (401) – token inválido o sin permisos")
-                        if resp.status == 404:
-                            raise FileNotFoundError(f"404 Not Found: {url}")
-                        
-                        resp.raise_for_status()
-                        return await resp.json()
-                        
-            except asyncio.TimeoutError:
-                if attempt < retries - 1:
-                    wait_time = 2 ** attempt
-                    self._metrics["total_retries"] += 1
-                    _LOGGER.warning(
-                        "Timeout en intento %d/%d para %s. Reintentando en %d segundos...", 
-                        attempt + 1, retries, path, wait_time
-                    )
-                    await asyncio.sleep(wait_time)
-                    continue
+                        if resp.status in RETRY_STATUS_CODES and not is_last:
+                            if resp.status == 503:
+                                retry_after = parse_retry_after(resp.headers)
+                            reason = f"Error {resp.status}"
+                        else:
+                            # Errores que no deben reintentar
+                            if resp.status == 401:
+                                raise PermissionError("Unauthorized (401) – token inválido o sin permisos")
+                            if resp.status == 404:
+                                raise FileNotFoundError(f"404 Not Found: {url}")
+
+                            resp.raise_for_status()
+                            body_start = loop.time()
+                            raw = await resp.read()
+                            decode_start = loop.time()
+                            payload = json_loads(raw) if raw.strip() else None
+                            endpoint = endpoint_key(path)
+                            self.timings.record(endpoint, PHASE_BODY, decode_start - body_start)
+                            self.timings.record(endpoint, PHASE_DECODE, loop.time() - decode_start)
+                            self._remember_validators(path, resp.headers, payload)
+                            return payload
+
+            except aiohttp.ClientResponseError:
+                # Estado HTTP definitivo (4xx o último intento): no se reintenta
                 raise
+            except asyncio.TimeoutError:
+                if is_last:
+                    raise
+                reason = "Timeout"
             except aiohttp.ClientError as e:
-                if attempt < retries - 1:
-                    wait_time = 2 ** attempt
-                    self._metrics["total_retries"] += 1
-                    _LOGGER.warning(
-                        "Error de conexión en intento %d/%d para %s: %s. Reintentando...", 
-                        attempt + 1, retries, path, str(e)
-                    )
-                    await asyncio.sleep(wait_time)
-                    continue
-                raise
-        
+                if is_last:
+                    raise
+                reason = f"Error de conexión ({e})"
+
+            # Si otras llamadas ya han abierto el circuito, no insistir
+            if self.breaker.is_open:
+                raise CircuitOpenError(self.breaker.name, self.breaker.retry_in())
+
+            # Espera fuera del semáforo: el resto de peticiones siguen avanzando
+            wait_time = backoff_delay(attempt, retry_after)
+            if loop.time() + wait_time >= deadline:
+                raise asyncio.TimeoutError(
+                    f"{reason} en {path}: la espera de {wait_time:.1f}s excede el plazo de {CALL_DEADLINE}s"
+                )
+            self._metrics["total_retries"] += 1
+            _LOGGER.warning(
+                "%s en intento %d/%d para %s. Reintentando en %.1f segundos...",
+                reason, attempt + 1, retries, path, wait_time
+            )
+            await asyncio.sleep(wait_time)
+
         raise Exception(f"Falló después de {retries} intentos para {path}")
 
     async def _get_json(self, path: str) -> Any:
-        """Obtiene datos JSON de la API con manejo de errores, reintentos y métricas."""
+        """Obtiene datos JSON de la API agrupando peticiones concurrentes al mismo path.
+
+        Si ya hay una petición en vuelo para ``path``, se espera su resultado en
+        lugar de lanzar otra llamada HTTP idéntica (single-flight).
+        """
+        task = self._inflight.get(path)
+        if task is not None:
+            self._metrics["coalesced_requests"] += 1
+            _LOGGER.debug("Request a %s agrupado con otro en curso", path)
+        else:
+            task = asyncio.ensure_future(self._get_json_uncoalesced(path))
+            self._inflight[path] = task
+            task.add_done_callback(lambda done: self._discard_inflight(path, done))
+        # shield: si un llamador se cancela, la petición compartida sigue para los demás
+        return await asyncio.shield(task)
+
+    def _discard_inflight(self, path: str, task: asyncio.Future) -> None:
+        """Elimina la petición terminada del registro de peticiones en vuelo."""
+        if self._inflight.get(path) is task:
+            del self._inflight[path]
+        # Marcar la excepción como recuperada si todos los llamadores se cancelaron
+        if not task.cancelled():
+            task.exception()
+
+    async def _get_json_uncoalesced(self, path: str) -> Any:
+        """Obtiene datos JSON de la API con manejo de errores, reintentos y métricas.
+
+        Con el circuito abierto falla al instante con ``CircuitOpenError``; la
+        sonda del estado semiabierto se hace con un único intento.
+        """
+        budget_wait = self.budget.wait_time()
+        if budget_wait > BUDGET_WAIT_MAX:
+            # Antes de tocar el circuito: quedarse sin cuota no dice nada del host
+            raise BudgetExhaustedError(self.budget.name, budget_wait)
+        probe = self.breaker.before_request()
         start_time = time.time()
         self._metrics["total_requests"] += 1
         
         try:
-            result = await self._get_json_with_retry(path)
+            result = await self._get_json_with_retry(path, 1 if probe else MAX_RETRIES)
             self._metrics["successful_requests"] += 1
+            self.breaker.record_success()
             
             response_time = time.time() - start_time
             self._metrics["last_request_time"] = response_time
+            self.timings.record(endpoint_key(path), PHASE_TOTAL, response_time)
             
             # Actualizar promedio de tiempo de respuesta
             total = self._metrics["successful_requests"]
@@ -104,88 +424,151 @@ class SentinelClient:
             
             _LOGGER.debug("Request a %s completado en %.2fs", path, response_time)
             return result
+
+        except CircuitOpenError as e:
+            self._metrics["failed_requests"] += 1
+            _LOGGER.debug("Request a %s cancelado: %s", path, e)
+            raise
+
+        except BudgetExhaustedError as e:
+            self._metrics["failed_requests"] += 1
+            if probe:
+                self.breaker.release_probe()
+            _LOGGER.debug("Request a %s no enviado: %s", path, e)
+            raise
             
+        except asyncio.CancelledError:
+            if probe:
+                self.breaker.release_probe()
+            raise
+
         except Exception as e:
             self._metrics["failed_requests"] += 1
+            if is_host_failure(e):
+                self.breaker.record_failure(str(e) or type(e).__name__)
+            else:
+                # El host responde (401, 404...): el problema no es de disponibilidad
+                self.breaker.record_success()
             _LOGGER.error("Error en request a %s después de todos los reintentos: %s", path, str(e))
             raise
 
-    def _extract_power_and_ts(self, payload: Any) -> Dict[str, Optional[Union[float, str]]]:
-        """Extrae potencia y timestamp de diferentes formatos de respuesta de la API con validación."""
-        power = 0.0
-        ts: Optional[str] = None
-        j = payload
-        
-        # Extraer potencia del payload
-        if isinstance(j, (int, float)):
-            power = float(j)
-        elif isinstance(j, dict):
-            # Buscar powerProduction primero (API de Sentinel Solar devuelve kW)
-            if "powerProduction" in j and j["powerProduction"] is not None:
-                power = float(j["powerProduction"]) * 1000  # Convertir kW a W
-            elif "power" in j:
-                power = float(j["power"])
-            elif "activePower" in j:
-                power = float(j["activePower"])
-            elif "data" in j and isinstance(j["data"], dict):
-                d = j["data"]
-                if "powerProduction" in d and d["powerProduction"] is not None:
-                    power = float(d["powerProduction"]) * 1000  # Convertir kW a W
-                elif "power" in d:
-                    power = float(d["power"])
-                elif "activePower" in d:
-                    power = float(d["activePower"])
-            
-            # Extraer timestamp (buscar "time" primero)
-            if "time" in j:
-                ts = j["time"]
-            elif "timestamp" in j:
-                ts = j["timestamp"]
-            elif "ts" in j:
-                ts = j["ts"]
-            elif "updatedAt" in j:
-                ts = j["updatedAt"]
-        
+    def _extract_power_and_ts(self, payload: Any, asset_id: Optional[str] = None) -> PowerSample:
+        """Extrae potencia y timestamp de diferentes formatos de respuesta de la API con validación.
+
+        Con ``asset_id`` se reutiliza el formato aprendido en la primera respuesta de
+        ese asset y sólo se vuelve a detectar si el payload deja de encajar.
+        """
+        shape = self._shapes.get(asset_id) if asset_id is not None else None
+        values = shape.read(payload) if shape is not None else None
+        if values is None:
+            shape = detect_payload_shape(payload)
+            values = shape.read(payload) if shape is not None else None
+            if shape is not None and asset_id is not None and shape.learnable:
+                self._shapes[asset_id] = shape
+                self._metrics["shape_detections"] += 1
+                _LOGGER.debug("Formato de respuesta del asset %s: %s", asset_id, shape.source)
+        if values is None:
+            power, ts, source = 0.0, None, "none"
+        else:
+            (power, ts), source = values, shape.source
+
         # Validar potencia - detectar valores anormales
-        max_power_w = MAX_POWER_KW * 1000
-        if power > max_power_w:
-            _LOGGER.warning(
-                "Potencia muy alta detectada: %.2f W (máx esperado: %.2f W). Limitando valor.",
-                power, max_power_w
-            )
-            power = max_power_w
-        elif power < MIN_POWER_W:
-            _LOGGER.warning(
-                "Potencia muy baja detectada: %.2f W (mín esperado: %.2f W). Limitando valor.",
-                power, MIN_POWER_W
-            )
-            power = MIN_POWER_W
-        
-        # Validar timestamp
+        power = _clamp_power(power)
+
+        # Parsear y validar timestamp una sola vez; el datetime viaja en la muestra
+        dt: Optional[datetime] = None
         if ts:
-            try:
-                from homeassistant.util import dt as dt_util
-                dt = dt_util.parse_datetime(ts)
-                if dt:
-                    now = dt_util.utcnow()
-                    # Verificar que no sea un timestamp muy antiguo (>7 días) o futuro (>1 hora)
-                    if dt > now + timedelta(hours=1):
-                        _LOGGER.warning("Timestamp en el futuro detectado: %s (ahora: %s)", ts, now)
-                    elif dt < now - timedelta(days=7):
-                        _LOGGER.warning("Timestamp muy antiguo detectado: %s (ahora: %s)", ts, now)
-            except Exception as e:
-                _LOGGER.warning("Error al validar timestamp '%s': %s", ts, str(e))
+            dt = parse_timestamp(ts)
+            if dt is None:
+                _LOGGER.warning("Timestamp no válido: '%s'", ts)
+            else:
+                now = datetime.now(timezone.utc)
+                # Verificar que no sea un timestamp muy antiguo (>7 días) o futuro (>1 hora)
+                if dt > now + timedelta(hours=1):
+                    _LOGGER.warning("Timestamp en el futuro detectado: %s (ahora: %s)", ts, now)
+                elif dt < now - timedelta(days=7):
+                    _LOGGER.warning("Timestamp muy antiguo detectado: %s (ahora: %s)", ts, now)
         
-        return {"power": power, "timestamp": ts}
+        return PowerSample(power=power, timestamp=dt, raw_timestamp=ts if isinstance(ts, str) else None, source=source)
 
-    async def fetch_power_instant(self, asset_id: str) -> Dict[str, Any]:
+    async def fetch_power_instant(self, asset_id: str) -> PowerSample:
         """Obtiene la potencia instantánea de un asset."""
         data = await self._get_json(f"/api/asset/{asset_id}/power-data/instant")
         _LOGGER.debug("Datos recibidos de la API: %s", data)
-        result = self._extract_power_and_ts(data)
-        _LOGGER.debug("Datos extraídos - Potencia: %.2f W, Timestamp: %s", result.get("power", 0), result.get("timestamp"))
+        result = self._extract_power_and_ts(data, asset_id)
+        _LOGGER.debug("Datos extraídos - Potencia: %.2f W, Timestamp: %s", result.power, result.raw_timestamp)
         return result
 
+    async def fetch_power_history(
+        self, asset_id: str, start: datetime, end: datetime
+    ) -> List[Tuple[datetime, float]]:
+        """Obtiene la serie histórica de potencia (W) de un asset entre ``start`` y ``end``.
+
+        El rango se pide en páginas de ``HISTORY_PAGE`` en paralelo (acotadas por el
+        semáforo del cliente) y se devuelve ordenado y sin timestamps duplicados.
+        """
+        pages = []
+        page_start = start
+        while page_start < end:
+            page_end = min(page_start + HISTORY_PAGE, end)
+            query = urlencode({"from": page_start.isoformat(), "to": page_end.isoformat()})
+            pages.append(self._get_json(f"/api/asset/{asset_id}/power-data?{query}"))
+            page_start = page_end
+
+        samples: Dict[datetime, float] = {}
+        for payload in await asyncio.gather(*pages):
+            for ts, power in self._extract_history(payload):
+                if start <= ts <= end:
+                    samples[ts] = power
+        return sorted(samples.items())
+
+    def _extract_history(self, payload: Any) -> List[Tuple[datetime, float]]:
+        """Extrae los puntos ``(timestamp, W)`` de una página de histórico."""
+        items = payload
+        if isinstance(payload, dict):
+            for key in ("data", "items", "values", "content"):
+                if isinstance(payload.get(key), list):
+                    items = payload[key]
+                    break
+        if not isinstance(items, list):
+            return []
+
+        # Todos los puntos de una página comparten formato: se detecta en el primero
+        shape: Optional[PayloadShape] = None
+        points = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                values = shape.read(item) if shape is not None else None
+                if values is None:
+                    detected = detect_payload_shape(item)
+                    values = detected.read(item) if detected is not None else None
+                    shape = detected if detected is not None and detected.learnable else None
+            except (TypeError, ValueError):
+                continue
+            if values is None:
+                continue
+            power, ts = values
+            timestamp = parse_timestamp(ts)
+            if timestamp is not None:
+                points.append((timestamp, _clamp_power(power)))
+        return points
+
+    async def fetch_power_instant_many(
+        self, asset_ids: List[str]
+    ) -> Dict[str, Union[PowerSample, BaseException]]:
+        """Obtiene la potencia instantánea de varios assets en paralelo.
+
+        Los errores no se propagan: cada asset fallido devuelve su excepción para
+        que un asset problemático no invalide el resto del lote.
+        """
+        results = await asyncio.gather(
+            *(self.fetch_power_instant(asset_id) for asset_id in asset_ids),
+            return_exceptions=True,
+        )
+        return dict(zip(asset_ids, results))
+
     async def fetch_asset_info(self, asset_id: str) -> Dict[str, Any]:
         """Obtiene información del asset, incluyendo el share_factor si está disponible."""
         try:
@@ -198,21 +581,14 @@ class SentinelClient:
     async def get_share_factor(self, asset_id: str) -> Optional[float]:
         """Intenta obtener el share_factor desde la API."""
         try:
-            asset_info = await self.fetch_asset_info(asset_id)
-            # Buscar el share_factor en diferentes campos posibles
-            if isinstance(asset_info, dict):
-                if "shareFactor" in asset_info:
-                    return float(asset_info["shareFactor"])
-                elif "share_factor" in asset_info:
-                    return float(asset_info["share_factor"])
-                elif "participationFactor" in asset_info:
-                    return float(asset_info["participationFactor"])
-                elif "participation_factor" in asset_info:
-                    return float(asset_info["participation_factor"])
-            return None
+            return extract_share_factor(await self.fetch_asset_info(asset_id))
         except Exception:
             return None
     
     def get_metrics(self) -> Dict[str, Any]:
-        """Obtiene métricas de rendimiento del cliente API."""
-        return self._metrics.copy()
+        """Obtiene métricas de rendimiento del cliente API, incluidos los percentiles de latencia."""
+        metrics = self._metrics.copy()
+        metrics["latency"] = self.timings.summary()
+        metrics["circuit"] = self.breaker.as_dict()
+        metrics["budget"] = self.budget.as_dict()
+        return metrics
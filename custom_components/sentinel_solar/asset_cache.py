@@ -0,0 +1,103 @@
+from __future__ import annotations
+from datetime import timedelta
+from typing import Any, Optional
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .api import SentinelClient
+from .const import DOMAIN, DATA_ASSET_CACHE
+from .storage import DebouncedSave
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.asset_info"
+STORAGE_VERSION = 1
+ASSET_INFO_TTL = timedelta(hours=24)  # Tras este tiempo se revalida en segundo plano
+SAVE_DELAY = 10  # Segundos para agrupar escrituras a disco
+
+
+class AssetInfoCache:
+    """Caché persistente (``Store``) de la información de ``/api/asset/{id}``.
+
+    Se comparte entre todas las entradas: en el arranque se sirve la copia en
+    disco y sólo se consulta la API si no hay copia o ha caducado el TTL.
+    También guarda la última lectura de potencia de cada asset, con la que el
+    coordinador arranca sin esperar a la API.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._assets: dict[str, dict[str, Any]] = {}
+        self._readings: dict[str, dict[str, Any]] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._load_task: Optional[asyncio.Task] = None
+        # Cada entrada guarda sus lecturas en cada sondeo: agrupar las escrituras
+        self._save = DebouncedSave(self._store, self._data_to_save, SAVE_DELAY)
+
+    async def async_load(self) -> None:
+        """Carga la caché desde disco una sola vez, aunque varias entradas la pidan a la vez."""
+        if self._load_task is None:
+            self._load_task = self._hass.async_create_task(self._async_load())
+        await self._load_task
+
+    async def _async_load(self) -> None:
+        stored = await self._store.async_load()
+        if isinstance(stored, dict):
+            self._assets = stored.get("assets") or {}
+            self._readings = stored.get("readings") or {}
+
+    def get(self, asset_id: str) -> Optional[dict[str, Any]]:
+        """Devuelve la información cacheada del asset (aunque esté caducada)."""
+        cached = self._assets.get(asset_id)
+        return cached["info"] if cached else None
+
+    def is_stale(self, asset_id: str) -> bool:
+        """Indica si la copia del asset no existe o ha superado el TTL."""
+        cached = self._assets.get(asset_id)
+        if not cached:
+            return True
+        return time.time() - cached.get("fetched_at", 0) > ASSET_INFO_TTL.total_seconds()
+
+    def get_reading(self, asset_id: str) -> Optional[dict[str, Any]]:
+        """Última lectura guardada del asset (``AssetSnapshot.as_stored``)."""
+        return self._readings.get(asset_id)
+
+    def set_readings(self, readings: dict[str, dict[str, Any]]) -> None:
+        """Guarda las últimas lecturas (agrupando las escrituras a disco)."""
+        self._readings.update(readings)
+        self._save.schedule()
+
+    async def async_refresh(self, client: SentinelClient, asset_id: str) -> Optional[dict[str, Any]]:
+        """Consulta la API y actualiza la caché. Llamadas concurrentes comparten la petición."""
+        task = self._refreshing.get(asset_id)
+        if task is None:
+            task = self._hass.async_create_task(self._async_fetch(client, asset_id))
+            self._refreshing[asset_id] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(asset_id, None))
+        return await asyncio.shield(task)
+
+    async def _async_fetch(self, client: SentinelClient, asset_id: str) -> Optional[dict[str, Any]]:
+        info = await client.fetch_asset_info(asset_id)
+        if not info:
+            # fetch_asset_info devuelve {} si falla: conservar la copia anterior
+            return self.get(asset_id)
+        self._assets[asset_id] = {"info": info, "fetched_at": time.time()}
+        self._save.schedule()
+        return info
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"assets": self._assets, "readings": self._readings}
+
+
+async def async_get_asset_cache(hass: HomeAssistant) -> AssetInfoCache:
+    """Devuelve la caché de assets del proceso, cargándola la primera vez."""
+    cache = hass.data.get(DATA_ASSET_CACHE)
+    if cache is None:
+        cache = hass.data[DATA_ASSET_CACHE] = AssetInfoCache(hass)
+    await cache.async_load()
+    return cache
@@ -0,0 +1,105 @@
+"""Relleno de huecos de energía a partir del histórico de potencia de la API."""
+from __future__ import annotations
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_import_statistics,
+    statistics_during_period,
+)
+from homeassistant.core import HomeAssistant
+
+from .api import SentinelClient
+from .integration import Sample, hourly_trapezoid_kwh, to_samples
+
+_LOGGER = logging.getLogger(__name__)
+
+BACKFILL_MAX_SPAN = timedelta(days=7)  # No reconstruir huecos más largos que esto
+
+
+async def async_fetch_gap_samples(
+    client: SentinelClient,
+    asset_id: str,
+    start: datetime,
+    end: datetime,
+    end_power_w: Optional[float] = None,
+) -> list[Sample]:
+    """Descarga la serie de potencia bruta (W) del hueco ``[start, end]``.
+
+    Si se conoce la potencia en ``end`` (la lectura que ha destapado el hueco) se
+    añade como último punto para cerrar la serie.
+    """
+    start = max(start, end - BACKFILL_MAX_SPAN)
+    points = await client.fetch_power_history(asset_id, start, end)
+    samples = to_samples(points)
+    if end_power_w is not None and (not samples or samples[-1][0] < end.timestamp()):
+        samples.append((end.timestamp(), float(end_power_w)))
+    return samples
+
+
+async def async_import_backfill_statistics(
+    hass: HomeAssistant,
+    statistic_id: str,
+    hourly_kwh: list[tuple[float, float]],
+    total_before_kwh: float,
+) -> int:
+    """Escribe las horas completas rellenadas en las estadísticas a largo plazo.
+
+    Cada fila lleva ``state`` = total acumulado al final de la hora y ``sum``
+    continuando la fila anterior al hueco, igual que lo calcularía el recorder.
+    Así, al compilar la hora en curso, el salto de estado del sensor no se
+    cuenta dos veces. Devuelve el número de horas importadas.
+    """
+    if "recorder" not in hass.config.components or not hourly_kwh:
+        return 0
+
+    now_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    first_hour = datetime.fromtimestamp(hourly_kwh[0][0], timezone.utc)
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period,
+        hass,
+        first_hour - timedelta(hours=1),
+        first_hour,
+        {statistic_id},
+        "hour",
+        None,
+        {"state", "sum"},
+    )
+    rows = stats.get(statistic_id) or []
+    if not rows or rows[-1].get("sum") is None:
+        _LOGGER.debug("Sin estadística base para %s: no se importan horas rellenadas", statistic_id)
+        return 0
+    base_sum = float(rows[-1]["sum"])
+    base_state = float(rows[-1].get("state") or 0.0)
+
+    statistics: list[StatisticData] = []
+    state = total_before_kwh
+    for hour_ts, kwh in hourly_kwh:
+        state += kwh
+        hour_start = datetime.fromtimestamp(hour_ts, timezone.utc)
+        if hour_start + timedelta(hours=1) > now_hour:
+            # La hora en curso la compila el recorder a partir del estado del sensor
+            break
+        statistics.append(
+            StatisticData(start=hour_start, state=state, sum=base_sum + (state - base_state))
+        )
+
+    if statistics:
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=None,
+            source="recorder",
+            statistic_id=statistic_id,
+            unit_of_measurement="kWh",
+        )
+        async_import_statistics(hass, metadata, statistics)
+    return len(statistics)
+
+
+def split_hourly(samples: list[Sample], factor: float) -> list[tuple[float, float]]:
+    """Energía por hora UTC de la serie, aplicando el factor de participación."""
+    return [(hour, kwh * factor) for hour, kwh in hourly_trapezoid_kwh(samples)]
@@ -0,0 +1,215 @@
+"""Presupuesto de peticiones (token bucket) por token de la API de Sentinel.
+
+Lo comparten, a través del registro de clientes, todas las entradas y el config
+flow que usan el mismo token. El límite se aprende de las cabeceras de rate
+limit de las respuestas; mientras no se conozca sólo frenan los 429 recientes.
+No depende de Home Assistant.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Any, Callable, Hashable, Mapping, Optional
+import logging
+import math
+import re
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+LIMIT_HEADERS = ("RateLimit-Limit", "X-RateLimit-Limit", "X-Rate-Limit-Limit")
+REMAINING_HEADERS = ("RateLimit-Remaining", "X-RateLimit-Remaining", "X-Rate-Limit-Remaining")
+RESET_HEADERS = ("RateLimit-Reset", "X-RateLimit-Reset", "X-Rate-Limit-Reset")
+POLICY_HEADER = "RateLimit-Policy"
+
+TARGET_USAGE = 0.8  # Fracción del límite que pueden ocupar los sondeos programados
+BLOCK_DEFAULT = 60.0  # Espera tras un 429 sin Retry-After (s)
+WINDOW_MAX = 86400.0  # Ventana máxima que se acepta de las cabeceras (s)
+THROTTLE_MEMORY = 3600.0  # Tiempo durante el que un 429 sigue alargando los intervalos (s)
+THROTTLE_SLOWDOWN = 2.0  # Factor por cada 429 reciente
+SLOWDOWN_MAX = 8.0  # Máximo alargamiento por 429 sin cabeceras
+
+_INT = re.compile(r"\s*(\d+)")
+_WINDOW = re.compile(r";\s*w\s*=\s*(\d+)")
+
+
+def _first_int(value: Optional[str]) -> Optional[int]:
+    match = _INT.match(value) if value else None
+    return int(match.group(1)) if match else None
+
+
+def _header(headers: Mapping[str, str], names: tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value:
+            return value
+    return None
+
+
+def parse_reset(headers: Mapping[str, str]) -> Optional[float]:
+    """Segundos hasta que se renueva la cuota según las cabeceras de rate limit."""
+    value = _header(headers, RESET_HEADERS)
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    # Algunas APIs devuelven un epoch absoluto en lugar de segundos restantes
+    if seconds > 1e9:
+        seconds -= time.time()
+    return max(seconds, 0.0)
+
+
+class BudgetExhaustedError(Exception):
+    """La llamada no se ha hecho porque el presupuesto de peticiones está agotado."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"Límite de peticiones de {name} agotado: próximo intento en {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class RateBudget:
+    """Token bucket con la cuota que anuncia la API para un token.
+
+    - Cada petición consume un token; ``RateLimit-Remaining`` corrige la cuenta.
+    - Los tokens se recuperan a ``limit / window`` por segundo. La ventana sale de
+      ``RateLimit-Policy`` (``w=``) o, si no, del mayor ``Reset`` observado.
+    - Un 429 vacía el bucket hasta ``Retry-After``.
+    - Los consumidores periódicos (coordinadores) registran su demanda; si la
+      suma supera ``TARGET_USAGE`` del límite, ``slowdown`` indica cuánto deben
+      alargar sus intervalos para repartirse la cuota. Sin cabeceras, cada 429
+      de la última hora duplica el factor (hasta ``SLOWDOWN_MAX``).
+    - Cada consumidor tiene un desfase propio dentro de su intervalo
+      (``next_slot``) para que los del mismo token no consulten a la vez.
+    """
+
+    def __init__(self, name: str, clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self._clock = clock
+        self.limit: Optional[int] = None
+        self.window: Optional[float] = None
+        self._tokens: Optional[float] = None
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._demand: dict[Hashable, float] = {}
+        self._throttle_times: deque[float] = deque()
+        self.requests = 0
+        self.throttled = 0
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Peticiones por segundo permitidas, si se conoce el límite."""
+        if not self.limit or not self.window:
+            return None
+        return self.limit / self.window
+
+    def _refill(self, now: float) -> None:
+        rate = self.rate
+        if rate is not None and self._tokens is not None:
+            self._tokens = min(float(self.limit), self._tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Actualiza el límite y los tokens con las cabeceras de una respuesta."""
+        limit_value = _header(headers, LIMIT_HEADERS)
+        remaining = _first_int(_header(headers, REMAINING_HEADERS))
+        if limit_value is None and remaining is None:
+            return
+        now = self._clock()
+        self._refill(now)
+        limit = _first_int(limit_value)
+        if limit:
+            self.limit = limit
+        window_match = _WINDOW.search(headers.get(POLICY_HEADER) or limit_value or "")
+        reset = parse_reset(headers)
+        if window_match:
+            self.window = min(float(window_match.group(1)), WINDOW_MAX) or None
+        elif reset:
+            self.window = min(max(self.window or 0.0, reset), WINDOW_MAX)
+        if remaining is not None:
+            self._tokens = float(remaining)
+            if remaining == 0 and reset:
+                self._blocked_until = max(self._blocked_until, now + reset)
+
+    def consume(self, count: int = 1) -> None:
+        """Anota peticiones enviadas."""
+        self.requests += count
+        self._refill(self._clock())
+        if self._tokens is not None:
+            self._tokens = max(0.0, self._tokens - count)
+
+    def exhausted(self, retry_after: Optional[float] = None) -> None:
+        """La API ha respondido 429: no enviar nada hasta ``retry_after``."""
+        now = self._clock()
+        self._refill(now)
+        self.throttled += 1
+        self._throttle_times.append(now)
+        if self.limit is not None:
+            self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + (retry_after or BLOCK_DEFAULT))
+        _LOGGER.warning(
+            "Límite de peticiones de %s alcanzado; se reanuda en %.0f s",
+            self.name, self._blocked_until - now,
+        )
+
+    def wait_time(self, count: int = 1) -> float:
+        """Segundos hasta que se puedan enviar ``count`` peticiones (0 = ya)."""
+        now = self._clock()
+        if self._blocked_until > now:
+            return self._blocked_until - now
+        rate = self.rate
+        if rate is None or self._tokens is None:
+            return 0.0
+        self._refill(now)
+        missing = min(count, self.limit) - self._tokens
+        return max(0.0, missing / rate)
+
+    def register(self, key: Hashable, requests_per_poll: int, interval_s: float) -> None:
+        """Registra (o actualiza) la demanda de un consumidor periódico."""
+        self._demand[key] = requests_per_poll / max(interval_s, 1.0)
+
+    def unregister(self, key: Hashable) -> None:
+        self._demand.pop(key, None)
+
+    def _recent_throttles(self) -> int:
+        cutoff = self._clock() - THROTTLE_MEMORY
+        while self._throttle_times and self._throttle_times[0] < cutoff:
+            self._throttle_times.popleft()
+        return len(self._throttle_times)
+
+    def slowdown(self) -> float:
+        """Factor (≥ 1) por el que los consumidores deben multiplicar su intervalo."""
+        factor = 1.0
+        recent = self._recent_throttles()
+        if recent:
+            factor = min(SLOWDOWN_MAX, THROTTLE_SLOWDOWN ** recent)
+        rate = self.rate
+        demand = sum(self._demand.values())
+        if rate is not None and demand > 0:
+            factor = max(factor, demand / (rate * TARGET_USAGE))
+        return factor
+
+    def next_slot(self, key: Hashable, interval_s: float) -> Optional[float]:
+        """Segundos hasta el turno de ``key`` (≥ ``interval_s``).
+
+        Los consumidores registrados se reparten el intervalo a partes iguales
+        según el orden de registro. ``None`` si ``key`` es el único consumidor.
+        """
+        if key not in self._demand or len(self._demand) < 2 or interval_s <= 0:
+            return None
+        offset = list(self._demand).index(key) * interval_s / len(self._demand)
+        now = self._clock()
+        turn = math.ceil((now + interval_s - offset) / interval_s) * interval_s + offset
+        return turn - now
+
+    def as_dict(self) -> dict[str, Any]:
+        """Estado del presupuesto para diagnóstico."""
+        return {
+            "limit": self.limit,
+            "window_s": self.window,
+            "tokens": round(self._tokens, 1) if self._tokens is not None else None,
+            "wait_s": round(self.wait_time(), 1),
+            "slowdown": round(self.slowdown(), 2),
+            "consumers": len(self._demand),
+            "requests": self.requests,
+            "throttled": self.throttled,
+        }
@@ -0,0 +1,112 @@
+"""Aprende cada cuánto (y en qué fase) publica Sentinel una muestra nueva.
+
+El endpoint instantáneo devuelve un ``time`` que sólo avanza cuando hay una
+muestra publicada. Con los timestamps distintos que se van viendo se estima el
+periodo (el mayor divisor común de sus diferencias), la fase y el retraso con
+el que la muestra aparece en la API. Con eso se puede consultar justo después
+de la siguiente publicación en lugar de a intervalos fijos. No depende de Home
+Assistant.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Any, Optional
+import math
+
+CADENCE_WINDOW = 12  # Timestamps distintos que se guardan
+MIN_SAMPLES = 3  # Timestamps distintos necesarios para fijar la cadencia
+MIN_PERIOD = 30.0  # s
+MAX_PERIOD = 3 * 3600.0  # s
+MAX_DIVISOR = 12  # Divisores del menor salto que se prueban como periodo
+PHASE_MARGIN = 10.0  # Margen tras la publicación esperada (s)
+MIN_DELAY = 30.0  # Nunca programar una consulta a menos de esto (s)
+LATENCY_DECAY = 0.9  # Tras cada acierto el retraso estimado se acerca a su cota inferior
+
+
+class PublishCadence:
+    """Periodo, fase y retraso de publicación de las muestras de un asset."""
+
+    __slots__ = ("_timestamps", "period", "phase", "latency", "_latency_floor", "duplicates")
+
+    def __init__(self) -> None:
+        self._timestamps: deque[float] = deque(maxlen=CADENCE_WINDOW)
+        self.period: Optional[float] = None
+        self.phase = 0.0
+        self.latency: Optional[float] = None  # Cuánto tarda una muestra en verse en la API
+        self._latency_floor = 0.0  # El retraso real es mayor: hubo consultas repetidas con este
+        self.duplicates = 0
+
+    @property
+    def locked(self) -> bool:
+        return self.period is not None and self.latency is not None
+
+    def observe(self, sample_ts: float, fetched_at: float) -> None:
+        """Anota el timestamp de la muestra devuelta por una consulta hecha en ``fetched_at``."""
+        if self.period is not None and self._timestamps:
+            # La publicación siguiente a la muestra devuelta aún no se veía en
+            # ``fetched_at``. Con consultas separadas más de un periodo la muestra
+            # no sale repetida, pero igualmente llega un periodo tarde
+            missed = fetched_at - (max(sample_ts, self._timestamps[-1]) + self.period)
+            if missed >= 0:
+                self._latency_floor = min(max(self._latency_floor, missed), self.period / 2)
+                self.latency = max(self.latency or 0.0, self._latency_floor + 1.0)
+        if self._timestamps and sample_ts <= self._timestamps[-1]:
+            if self.period is not None:
+                self.duplicates += 1
+            return
+        age = max(0.0, fetched_at - sample_ts)
+        # Cota superior del retraso: la muestra ya se veía con esta antigüedad. Al
+        # consultar siempre justo tras la publicación esperada la cota no baja sola:
+        # se acerca poco a poco a la cota inferior que dejan las consultas tempranas
+        if self.latency is None or age < self.latency:
+            self.latency = age
+        elif self.locked:
+            floor = min(self._latency_floor, self.latency)
+            self.latency = floor + (self.latency - floor) * LATENCY_DECAY
+        self._timestamps.append(sample_ts)
+        self._estimate()
+
+    def _estimate(self) -> None:
+        if len(self._timestamps) < MIN_SAMPLES:
+            return
+        stamps = list(self._timestamps)
+        gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+        smallest = min(gaps)
+        for divisor in range(1, MAX_DIVISOR + 1):
+            period = smallest / divisor
+            if period < MIN_PERIOD:
+                break
+            tolerance = max(2.0, 0.02 * period)
+            if all(abs(gap - round(gap / period) * period) <= tolerance for gap in gaps):
+                if period <= MAX_PERIOD:
+                    self.period = period
+                    self.phase = stamps[-1] % period
+                return
+        self.period = None
+
+    def align(self, now: float, interval: float) -> Optional[float]:
+        """Segundos hasta la primera publicación visible a partir de ``now + interval``.
+
+        Nunca se consulta antes del intervalo pedido (el del usuario o el alargado
+        por la cuota), así que no se consulta más a menudo de lo configurado. Una
+        publicación que cae menos de ``PHASE_MARGIN`` antes del intervalo cuenta
+        como esa: se consulta al cumplirse el intervalo, con la muestra ya
+        visible, en lugar de saltar un periodo entero cada vez que baja el
+        retraso estimado. Devuelve ``None`` si aún no se conoce la cadencia.
+        """
+        if not self.locked:
+            return None
+        period = self.period
+        offset = self.phase + self.latency + PHASE_MARGIN
+        earliest = now + max(MIN_DELAY, interval)
+        target = offset + math.ceil((earliest - PHASE_MARGIN - offset) / period) * period
+        return max(target, earliest) - now
+
+    def as_dict(self) -> dict[str, Any]:
+        """Estado para diagnóstico."""
+        return {
+            "period_s": round(self.period, 1) if self.period else None,
+            "phase_s": round(self.phase, 1) if self.period else None,
+            "latency_s": round(self.latency, 1) if self.latency is not None else None,
+            "samples": len(self._timestamps),
+            "duplicates": self.duplicates,
+        }
@@ -0,0 +1,150 @@
+"""Circuit breaker por host para las llamadas a la API de Sentinel.
+
+No depende de Home Assistant: lo usa ``SentinelClient`` y se puede ejecutar
+fuera de HA (benchmarks).
+"""
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+CIRCUIT_STATES = [STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN]
+
+FAILURE_THRESHOLD = 3  # Llamadas fallidas seguidas (cada una ya con sus reintentos) para abrir
+OPEN_BASE = 60.0  # Primera espera antes de la sonda (s)
+OPEN_MAX = 1800.0  # Espera máxima entre sondas (s)
+
+
+class CircuitOpenError(Exception):
+    """La llamada se ha rechazado sin tocar la red porque el circuito está abierto."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"API no disponible ({name}): próximo intento en {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Corta las llamadas a un host tras varios fallos seguidos.
+
+    - ``closed``: las llamadas pasan; cada fallo suma y un éxito reinicia la cuenta.
+    - ``open``: las llamadas fallan al instante con ``CircuitOpenError``.
+    - ``half_open``: pasado el tiempo de espera se deja pasar una única sonda. Si
+      responde se cierra el circuito; si falla se vuelve a abrir con una espera
+      el doble de larga (hasta ``OPEN_MAX``).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        open_base: float = OPEN_BASE,
+        open_max: float = OPEN_MAX,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = max(1, failure_threshold)
+        self._open_base = open_base
+        self._open_max = open_max
+        self._clock = clock
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._consecutive_opens = 0
+        self._retry_at = 0.0
+        self._retry_at_utc: Optional[datetime] = None
+        self._probe_in_flight = False
+        self.last_error: Optional[str] = None
+        self.opened_total = 0
+        self.rejected_requests = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self._state == STATE_OPEN
+
+    def retry_in(self) -> float:
+        """Segundos que faltan para la próxima sonda (0 si ya se puede llamar)."""
+        if self._state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self._retry_at - self._clock())
+
+    def before_request(self) -> bool:
+        """Comprueba si la llamada puede salir; devuelve ``True`` si es la sonda.
+
+        Lanza ``CircuitOpenError`` si el circuito está abierto o ya hay una sonda en curso.
+        """
+        if self._state == STATE_CLOSED:
+            return False
+        if self._state == STATE_OPEN:
+            retry_in = self.retry_in()
+            if retry_in > 0:
+                self.rejected_requests += 1
+                raise CircuitOpenError(self.name, retry_in)
+            self._state = STATE_HALF_OPEN
+        if self._probe_in_flight:
+            self.rejected_requests += 1
+            raise CircuitOpenError(self.name, 0.0)
+        self._probe_in_flight = True
+        _LOGGER.debug("Circuito de %s semiabierto: enviando sonda", self.name)
+        return True
+
+    def record_success(self) -> None:
+        """El host ha respondido: cerrar el circuito y reiniciar la cuenta de fallos."""
+        if self._state != STATE_CLOSED:
+            _LOGGER.info("API de %s recuperada: circuito cerrado", self.name)
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._consecutive_opens = 0
+        self._probe_in_flight = False
+        self._retry_at_utc = None
+
+    def record_failure(self, error: str) -> None:
+        """Anota un fallo del host y abre el circuito si toca."""
+        self._failures += 1
+        self.last_error = error
+        if self._state == STATE_HALF_OPEN or (
+            self._state == STATE_CLOSED and self._failures >= self._failure_threshold
+        ):
+            self._open()
+
+    def release_probe(self) -> None:
+        """La sonda se canceló sin resultado: permitir otra en la próxima llamada."""
+        if self._state == STATE_HALF_OPEN and self._probe_in_flight:
+            self._probe_in_flight = False
+            self._state = STATE_OPEN
+            self._retry_at = self._clock()
+
+    def _open(self) -> None:
+        self._consecutive_opens += 1
+        delay = min(self._open_max, self._open_base * (2 ** (self._consecutive_opens - 1)))
+        self._state = STATE_OPEN
+        self._probe_in_flight = False
+        self._retry_at = self._clock() + delay
+        self._retry_at_utc = datetime.fromtimestamp(time.time() + delay, timezone.utc)
+        self.opened_total += 1
+        if self._consecutive_opens == 1:
+            _LOGGER.warning(
+                "API de %s no disponible tras %d fallos seguidos (%s). Se reintentará en %.0f s",
+                self.name, self._failures, self.last_error, delay,
+            )
+        else:
+            _LOGGER.debug("Sonda a %s fallida; próxima en %.0f s", self.name, delay)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Estado del circuito para diagnóstico y atributos."""
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "next_probe": self._retry_at_utc.isoformat() if self._retry_at_utc else None,
+            "opened_total": self.opened_total,
+            "rejected_requests": self.rejected_requests,
+            "last_error": self.last_error,
+        }
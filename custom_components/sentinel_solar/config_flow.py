@@ -4,14 +4,21 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.core import callback
-from homeassistant.helpers import aiohttp_client
 
 from .const import (
     DOMAIN, CONF_TOKEN, CONF_ASSET_GENERAL,
-    CONF_BASE_URL, CONF_UPDATE_MINUTES, CONF_SHARE_FACTOR,
-    DEFAULT_BASE_URL, DEFAULT_UPDATE_MINUTES, DEFAULT_SHARE_FACTOR
+    CONF_BASE_URL, CONF_UPDATE_MINUTES, CONF_SHARE_FACTOR, CONF_ASSETS,
+    CONF_INTEGRATION_METHOD, CONF_ADAPTIVE_POLLING, CONF_DAILY_REQUEST_BUDGET,
+    CONF_POWER_DEADBAND, CONF_ENERGY_DEADBAND, CONF_MIN_WRITE_INTERVAL, CONF_NOWCAST,
+    CONF_MAX_STALENESS, CONF_FAST_START,
+    DEFAULT_BASE_URL, DEFAULT_UPDATE_MINUTES, DEFAULT_SHARE_FACTOR,
+    DEFAULT_INTEGRATION_METHOD, DEFAULT_ADAPTIVE_POLLING, DEFAULT_DAILY_REQUEST_BUDGET,
+    DEFAULT_POWER_DEADBAND, DEFAULT_ENERGY_DEADBAND, DEFAULT_MIN_WRITE_INTERVAL, DEFAULT_NOWCAST,
+    DEFAULT_MAX_STALENESS, DEFAULT_FAST_START
 )
-from .api import SentinelClient
+from .registry import async_get_registry
+from .coordinator import parse_asset_ids
+from .integration import INTEGRATION_METHODS
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """ConfigFlow para la integración sentinel_solar (proyecto no oficial)."""
@@ -21,9 +28,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input: Optional[dict[str, Any]] = None):
         errors = {}
         if user_input is not None:
-            session = aiohttp_client.async_get_clientsession(self.hass)
-            client = SentinelClient(
-                session,
+            # Reutiliza el cliente compartido si ya hay entradas con esta URL y token
+            client = async_get_registry(self.hass).async_get_client(
                 user_input.get(CONF_BASE_URL, DEFAULT_BASE_URL),
                 user_input[CONF_TOKEN]
             )
@@ -73,6 +79,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         vol.Required(CONF_ASSET_GENERAL, default=user_input.get(CONF_ASSET_GENERAL, "")): str,
                         vol.Optional(CONF_UPDATE_MINUTES, default=user_input.get(CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES)): vol.All(int, vol.Range(min=1, max=1440)),
                         vol.Optional(CONF_SHARE_FACTOR, default=""): str,
+                        vol.Optional(CONF_ASSETS, default=user_input.get(CONF_ASSETS, "")): str,
                     })
                     return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
                 
@@ -86,6 +93,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     options={
                         CONF_UPDATE_MINUTES: user_input.get(CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES),
                         CONF_SHARE_FACTOR: share_factor,
+                        CONF_ASSETS: parse_asset_ids(user_input.get(CONF_ASSETS)),
                     }
                 )
 
@@ -95,6 +103,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Required(CONF_ASSET_GENERAL): str,
             vol.Optional(CONF_UPDATE_MINUTES, default=DEFAULT_UPDATE_MINUTES): vol.All(int, vol.Range(min=1, max=1440)),
             vol.Optional(CONF_SHARE_FACTOR, default=""): str,
+            vol.Optional(CONF_ASSETS, default=""): str,
         })
         return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
 
@@ -129,6 +138,10 @@ class OptionsFlow(config_entries.OptionsFlow):
                     # Si está vacío, mantener el valor actual
                     user_input[CONF_SHARE_FACTOR] = self.entry.options.get(CONF_SHARE_FACTOR, DEFAULT_SHARE_FACTOR)
             
+            # Lista de assets adicionales (separados por comas)
+            if CONF_ASSETS in user_input:
+                user_input[CONF_ASSETS] = parse_asset_ids(user_input[CONF_ASSETS])
+
             if not errors:
                 return self.async_create_entry(title="", data=user_input)
 
@@ -138,6 +151,7 @@ class OptionsFlow(config_entries.OptionsFlow):
             current_share_str = str(current_share)
         else:
             current_share_str = str(current_share) if current_share else ""
+        current_assets_str = ", ".join(parse_asset_ids(self.entry.options.get(CONF_ASSETS)))
 
         schema = vol.Schema({
             vol.Optional(
@@ -148,5 +162,45 @@ class OptionsFlow(config_entries.OptionsFlow):
                 CONF_SHARE_FACTOR,
                 default=current_share_str
             ): str,
+            vol.Optional(
+                CONF_ASSETS,
+                default=current_assets_str
+            ): str,
+            vol.Optional(
+                CONF_INTEGRATION_METHOD,
+                default=self.entry.options.get(CONF_INTEGRATION_METHOD, DEFAULT_INTEGRATION_METHOD)
+            ): vol.In(INTEGRATION_METHODS),
+            vol.Optional(
+                CONF_ADAPTIVE_POLLING,
+                default=self.entry.options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)
+            ): bool,
+            vol.Optional(
+                CONF_DAILY_REQUEST_BUDGET,
+                default=self.entry.options.get(CONF_DAILY_REQUEST_BUDGET, DEFAULT_DAILY_REQUEST_BUDGET)
+            ): vol.All(int, vol.Range(min=0, max=100000)),
+            vol.Optional(
+                CONF_POWER_DEADBAND,
+                default=self.entry.options.get(CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND)
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100000)),
+            vol.Optional(
+                CONF_ENERGY_DEADBAND,
+                default=self.entry.options.get(CONF_ENERGY_DEADBAND, DEFAULT_ENERGY_DEADBAND)
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+            vol.Optional(
+                CONF_MIN_WRITE_INTERVAL,
+                default=self.entry.options.get(CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL)
+            ): vol.All(int, vol.Range(min=0, max=86400)),
+            vol.Optional(
+                CONF_NOWCAST,
+                default=self.entry.options.get(CONF_NOWCAST, DEFAULT_NOWCAST)
+            ): bool,
+            vol.Optional(
+                CONF_MAX_STALENESS,
+                default=self.entry.options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)
+            ): vol.All(int, vol.Range(min=0, max=1440)),
+            vol.Optional(
+                CONF_FAST_START,
+                default=self.entry.options.get(CONF_FAST_START, DEFAULT_FAST_START)
+            ): bool,
         })
         return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
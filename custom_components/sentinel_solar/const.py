@@ -1,11 +1,34 @@
 DOMAIN = "sentinel_solar"
+DATA_CLIENTS = f"{DOMAIN}_clients"  # Registro de clientes compartidos en hass.data
+DATA_ASSET_CACHE = f"{DOMAIN}_asset_cache"  # Caché persistente de información de assets
+DATA_ENERGY_LEDGER = f"{DOMAIN}_energy_ledger"  # Puntos de control de los sensores de energía
 
 CONF_TOKEN = "token"
 CONF_ASSET_GENERAL = "asset_general"
 CONF_BASE_URL = "base_url"
 CONF_UPDATE_MINUTES = "update_minutes"
 CONF_SHARE_FACTOR = "share_factor"
+CONF_ASSETS = "assets"  # Assets adicionales consultados por la misma entrada
+CONF_INTEGRATION_METHOD = "integration_method"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_DAILY_REQUEST_BUDGET = "daily_request_budget"  # 0 = sin límite
+CONF_POWER_DEADBAND = "power_deadband"  # W
+CONF_ENERGY_DEADBAND = "energy_deadband"  # kWh
+CONF_MIN_WRITE_INTERVAL = "min_write_interval"  # Segundos
+CONF_NOWCAST = "nowcast"  # Estimar la potencia entre consultas
+CONF_MAX_STALENESS = "max_staleness"  # Minutos; 0 = no servir lecturas antiguas
+CONF_FAST_START = "fast_start"  # Arrancar con la última lectura guardada
 
 DEFAULT_BASE_URL = "https://apiv3.sentinel-solar.com"
 DEFAULT_UPDATE_MINUTES = 60
 DEFAULT_SHARE_FACTOR = 0.025  # Cambia si quieres otro valor por defecto
+DEFAULT_INTEGRATION_METHOD = "right"  # La integración rectangular original; el resto es opcional
+DEFAULT_ADAPTIVE_POLLING = False
+DEFAULT_DAILY_REQUEST_BUDGET = 0
+DEFAULT_POWER_DEADBAND = 0.0  # 0 = escribir ante cualquier cambio
+DEFAULT_ENERGY_DEADBAND = 0.0
+DEFAULT_MIN_WRITE_INTERVAL = 0
+DEFAULT_NOWCAST = False
+DEFAULT_MAX_STALENESS = 180
+DEFAULT_FAST_START = True
+NOWCAST_INTERVAL_SECONDS = 300  # Cada cuánto se publica una estimación entre consultas
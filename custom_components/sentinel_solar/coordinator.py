@@ -0,0 +1,324 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import PowerSample, SentinelClient
+from .asset_cache import AssetInfoCache
+from .cadence import PublishCadence
+from .const import DEFAULT_MAX_STALENESS, DEFAULT_SHARE_FACTOR
+from .scheduler import AdaptivePollScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+RETRY_MIN = 60.0  # Primer reintento tras una consulta fallida (s)
+RETRY_MAX = 900.0  # Máxima espera entre reintentos (s)
+# Antigüedad máxima de la lectura guardada para arrancar sin consultar; no depende
+# de ``max_staleness``, así que desactivar las lecturas antiguas no desactiva el arranque rápido
+FAST_START_MAX_AGE = timedelta(hours=3)
+
+
+def parse_asset_ids(value: Any) -> list[str]:
+    """Normaliza una lista de assets (lista o texto separado por comas/espacios)."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        items: Iterable[Any] = value.replace(";", ",").replace("\n", ",").split(",")
+    else:
+        items = value
+    asset_ids: list[str] = []
+    for item in items:
+        asset_id = str(item).strip()
+        if asset_id and asset_id not in asset_ids:
+            asset_ids.append(asset_id)
+    return asset_ids
+
+
+@dataclass(frozen=True, slots=True)
+class AssetSnapshot:
+    """Valores de un asset ya derivados, calculados una vez por actualización.
+
+    Todas las entidades de la entrada leen de aquí en lugar de volver a aplicar
+    el factor de participación o recorrer el payload en cada escritura de estado.
+    """
+
+    power_w: float  # Con el factor de participación aplicado, redondeada a 0,1 W
+    raw_power_w: float  # Tal como la devuelve la API
+    timestamp: Optional[datetime]  # UTC
+    raw_timestamp: Optional[str]
+    factor: float
+    source: str
+    fetched_at: datetime  # UTC; cuándo se obtuvo de la API
+
+    @classmethod
+    def from_sample(cls, sample: PowerSample, factor: float, fetched_at: datetime) -> AssetSnapshot:
+        return cls(
+            power_w=round(sample.power * factor, 1),
+            raw_power_w=sample.power,
+            timestamp=sample.timestamp,
+            raw_timestamp=sample.raw_timestamp,
+            factor=factor,
+            source=sample.source,
+            fetched_at=fetched_at,
+        )
+
+    def as_stored(self) -> dict[str, Any]:
+        """Datos para guardar en disco (sin el factor, que se aplica al recuperar)."""
+        return {
+            "raw_power_w": self.raw_power_w,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "raw_timestamp": self.raw_timestamp,
+            "source": self.source,
+            "fetched_at": self.fetched_at.isoformat(),
+        }
+
+    @classmethod
+    def from_stored(cls, data: Any, factor: float) -> Optional[AssetSnapshot]:
+        """Reconstruye una lectura guardada; ``None`` si el registro no es válido."""
+        try:
+            raw_power_w = float(data["raw_power_w"])
+            fetched_at = dt_util.parse_datetime(data["fetched_at"])
+            timestamp = dt_util.parse_datetime(data["timestamp"]) if data.get("timestamp") else None
+        except (KeyError, TypeError, ValueError):
+            return None
+        if fetched_at is None:
+            return None
+        return cls(
+            power_w=round(raw_power_w * factor, 1),
+            raw_power_w=raw_power_w,
+            timestamp=timestamp,
+            raw_timestamp=data.get("raw_timestamp"),
+            factor=factor,
+            source=str(data.get("source") or ""),
+            fetched_at=fetched_at,
+        )
+
+
+class SentinelCoordinator(DataUpdateCoordinator):
+    """Coordinador que consulta en paralelo todos los assets de una entrada.
+
+    ``data`` tiene la forma ``{"assets": {asset_id: AssetSnapshot}, "errors":
+    {asset_id: str}, "stale": [asset_id]}``. Si un asset falla se sigue sirviendo
+    su última lectura (y se anota en ``stale``) mientras no supere
+    ``max_staleness``; sólo se lanza ``UpdateFailed`` si no queda ningún asset que
+    servir. Tras un fallo se programa un reintento más corto que el intervalo
+    normal, con espera creciente.
+
+    El intervalo se alarga si la demanda de todas las entradas con el mismo
+    token supera la cuota de la API (``RateBudget.slowdown``).
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: SentinelClient,
+        asset_general: str,
+        extra_assets: Optional[list[str]] = None,
+        update_minutes: int = 60,
+        scheduler: Optional[AdaptivePollScheduler] = None,
+        share_factor: float = DEFAULT_SHARE_FACTOR,
+        max_staleness: int = DEFAULT_MAX_STALENESS,
+        asset_cache: Optional[AssetInfoCache] = None,
+    ) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="sentinel_solar_coordinator",
+            update_interval=timedelta(minutes=update_minutes),
+        )
+        self.client = client
+        self.asset_general = asset_general
+        self.asset_ids: list[str] = parse_asset_ids([asset_general, *(extra_assets or [])])
+        self.update_minutes = update_minutes
+        # Planificador adaptativo opcional: ajusta update_interval tras cada consulta
+        self.scheduler = scheduler
+        # Se cambia en caliente con ``set_share_factor``
+        self.share_factor = share_factor
+        # Antigüedad máxima de una lectura servida tras un fallo (0 = no servir)
+        self.max_staleness = timedelta(minutes=max_staleness)
+        self._retry_delay = 0.0
+        self._unsub_retry: Optional[CALLBACK_TYPE] = None
+        # Donde se guardan las últimas lecturas para el arranque rápido
+        self._asset_cache = asset_cache
+        # Cadencia de publicación del asset principal, para consultar justo tras cada muestra
+        self.cadence = PublishCadence()
+        self._register_demand()
+
+    def snapshot(self, asset_id: str) -> Optional[AssetSnapshot]:
+        """Última lectura del asset, o ``None`` si falló en la última consulta."""
+        if self.data is None:
+            return None
+        return self.data["assets"].get(asset_id)
+
+    @callback
+    def set_share_factor(self, share_factor: float) -> None:
+        """Aplica un nuevo factor a las lecturas actuales sin consultar la API."""
+        self.share_factor = share_factor
+        if self.data is None:
+            return
+        assets = {
+            asset_id: replace(
+                snapshot, factor=share_factor, power_w=round(snapshot.raw_power_w * share_factor, 1)
+            )
+            for asset_id, snapshot in self.data["assets"].items()
+        }
+        self.data = {**self.data, "assets": assets}
+        self.async_update_listeners()
+
+    def _register_demand(self) -> None:
+        """Declara al presupuesto del token cuántas peticiones hace este coordinador."""
+        self.client.budget.register(self, len(self.asset_ids), self.update_minutes * 60)
+
+    def _next_interval(self) -> timedelta:
+        """Intervalo normal (o el del planificador), alargado si falta cuota.
+
+        Con la cuota holgada, si ya se conoce la cadencia de publicación, se alarga
+        hasta justo después de la primera muestra esperada tras ese intervalo. Si
+        falta cuota (o no hay cadencia), se espera al turno de este coordinador
+        entre los que comparten el token. Nunca se acorta.
+        """
+        budget = self.client.budget
+        if self.scheduler is not None:
+            interval = self.scheduler.next_interval(len(self.asset_ids))
+        else:
+            interval = timedelta(minutes=self.update_minutes)
+        slowdown = budget.slowdown()
+        wait = budget.wait_time(len(self.asset_ids))
+        if slowdown > 1 or wait > 0:
+            self.logger.debug("Cuota de la API justa: intervalo ×%.2f, espera %.0f s", slowdown, wait)
+            interval = max(interval * slowdown, timedelta(seconds=wait))
+        else:
+            aligned = self.cadence.align(dt_util.utcnow().timestamp(), interval.total_seconds())
+            if aligned is not None:
+                return timedelta(seconds=round(aligned))
+        slot = budget.next_slot(self, interval.total_seconds())
+        if slot is not None:
+            interval = timedelta(seconds=round(slot))
+        return interval
+
+    @callback
+    def set_update_minutes(self, update_minutes: int) -> None:
+        """Cambia el intervalo de sondeo y reprograma la próxima consulta desde ahora."""
+        self.update_minutes = update_minutes
+        if self.scheduler is not None:
+            self.scheduler.base_interval = timedelta(minutes=update_minutes)
+        self._register_demand()
+        self.update_interval = self._next_interval()
+        if self._listeners:
+            self._schedule_refresh()
+
+    def restore_readings(self) -> bool:
+        """Parte de las lecturas guardadas, marcadas como antiguas, sin consultar la API.
+
+        Devuelve ``True`` si hay lectura reciente (dentro de ``FAST_START_MAX_AGE``)
+        de todos los assets; si no, hace falta una primera consulta normal.
+        """
+        if self._asset_cache is None:
+            return False
+        now = dt_util.utcnow()
+        assets: dict[str, AssetSnapshot] = {}
+        for asset_id in self.asset_ids:
+            snapshot = AssetSnapshot.from_stored(
+                self._asset_cache.get_reading(asset_id), self.share_factor
+            )
+            if snapshot is None or now - snapshot.fetched_at > FAST_START_MAX_AGE:
+                return False
+            assets[asset_id] = snapshot
+        self.data = {"assets": assets, "errors": {}, "stale": list(assets)}
+        return True
+
+    def is_stale(self, asset_id: str) -> bool:
+        """``True`` si la lectura del asset es la anterior, servida porque la última consulta falló."""
+        return self.data is not None and asset_id in self.data.get("stale", ())
+
+    @callback
+    def _schedule_retry(self) -> None:
+        """Programa un reintento antes del próximo sondeo normal, con espera creciente."""
+        self._cancel_retry()
+        self._retry_delay = min(RETRY_MAX, max(RETRY_MIN, self._retry_delay * 2))
+        delay = max(
+            self._retry_delay,
+            self.client.breaker.retry_in(),
+            self.client.budget.wait_time(len(self.asset_ids)),
+        )
+        if self.update_interval is not None and delay >= self.update_interval.total_seconds():
+            return  # El sondeo normal llega antes
+        self._unsub_retry = async_call_later(self.hass, delay, self._handle_retry)
+        self.logger.debug("Reintento programado en %.0f s", delay)
+
+    @callback
+    def _handle_retry(self, _now: datetime) -> None:
+        self._unsub_retry = None
+        self.hass.async_create_task(self.async_refresh())
+
+    @callback
+    def _cancel_retry(self) -> None:
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+            self._unsub_retry = None
+
+    async def async_shutdown(self) -> None:
+        self._cancel_retry()
+        self.client.budget.unregister(self)
+        await super().async_shutdown()
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        if self.scheduler is not None:
+            self.scheduler.record_requests(len(self.asset_ids))
+        results = await self.client.fetch_power_instant_many(self.asset_ids)
+
+        now = dt_util.utcnow()
+        assets: dict[str, Any] = {}
+        errors: dict[str, str] = {}
+        stale: list[str] = []
+        for asset_id, result in results.items():
+            if isinstance(result, BaseException):
+                errors[asset_id] = str(result) or type(result).__name__
+                previous = self.snapshot(asset_id)
+                if previous is not None and now - previous.fetched_at <= self.max_staleness:
+                    # Mientras no sea demasiado antigua, servir la última lectura
+                    assets[asset_id] = previous
+                    stale.append(asset_id)
+            else:
+                assets[asset_id] = AssetSnapshot.from_sample(result, self.share_factor, now)
+
+        if self._asset_cache is not None and len(stale) < len(assets):
+            self._asset_cache.set_readings(
+                {asset_id: snapshot.as_stored() for asset_id, snapshot in assets.items()
+                 if asset_id not in stale}
+            )
+        if not errors:
+            self._retry_delay = 0.0
+            self._cancel_retry()
+        else:
+            if self.data is not None:  # En la primera consulta reintenta Home Assistant
+                self._schedule_retry()
+            if len(stale) == len(assets):
+                if not assets:
+                    raise UpdateFailed(
+                        "; ".join(f"{asset_id}: {err}" for asset_id, err in errors.items())
+                    )
+                # Ningún asset respondió: no insistir en el log mientras se sirve lo anterior
+                self.logger.debug("Consulta fallida; se sirven los datos anteriores")
+                self.update_interval = self._next_interval()
+                return {"assets": assets, "errors": errors, "stale": stale}
+            _LOGGER.warning(
+                "No se pudieron leer %d de %d assets: %s",
+                len(errors), len(self.asset_ids), ", ".join(errors),
+            )
+
+        general = assets.get(self.asset_general)
+        if general is not None and self.asset_general not in stale:
+            if general.timestamp is not None:
+                self.cadence.observe(general.timestamp.timestamp(), now.timestamp())
+            if self.scheduler is not None:
+                self.scheduler.record_power(general.raw_power_w)
+        self.update_interval = self._next_interval()
+        self.logger.debug("Próxima consulta en %s", self.update_interval)
+        return {"assets": assets, "errors": errors, "stale": stale}
@@ -0,0 +1,39 @@
+"""Diagnóstico descargable de la integración."""
+from __future__ import annotations
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_TOKEN
+from .registry import async_get_registry
+
+TO_REDACT = {CONF_TOKEN}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Devuelve configuración, estado del coordinador y métricas del cliente."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data["coordinator"]
+    client = data["client"]
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "asset_info": data.get("asset_info"),
+        "coordinator": {
+            "asset_ids": coordinator.asset_ids,
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "errors": (coordinator.data or {}).get("errors"),
+            "stale_assets": (coordinator.data or {}).get("stale"),
+            "publish_cadence": coordinator.cadence.as_dict(),
+        },
+        "client": client.get_metrics(),
+        "shared_clients": async_get_registry(hass).async_get_stats(),
+    }
@@ -0,0 +1,418 @@
+"""Exportador sin Home Assistant: consulta una flota de assets y publica sus lecturas.
+
+Usa el mismo ``SentinelClient`` que la integración (circuit breaker por host,
+presupuesto por token y cadencia de publicación aprendida) para recoger la
+potencia de muchos assets desde una máquina pequeña, sin levantar un Home
+Assistant por instalación. Las lecturas se sirven en formato de texto de
+Prometheus (``/metrics``) y/o se añaden a un fichero JSON Lines.
+
+El ``__init__`` del paquete importa Home Assistant, así que el exportador se
+lanza con ``sentinel_exporter.py`` (en la raíz del repositorio), que carga este
+módulo sin ejecutarlo:
+
+    python sentinel_exporter.py --assets-file assets.txt --listen 0.0.0.0:9464 --output samples.jsonl
+
+Cada línea de ``assets.txt`` es ``asset_id[,token[,share_factor]]``; el token
+por defecto sale de ``--token`` o de la variable ``SENTINEL_TOKEN``.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+from urllib.parse import urlparse
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+from .api import MAX_CONCURRENT_REQUESTS, PowerSample, SentinelClient
+from .budget import RateBudget
+from .cadence import PublishCadence
+from .circuit import CircuitBreaker
+from .const import DEFAULT_BASE_URL
+from .metrics import PHASE_TOTAL, RequestTimings, create_trace_config
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 300  # s
+RETRY_MIN = 60.0  # Espera mínima tras una ronda sin ningún asset leído (s)
+START_STAGGER = 2.0  # s entre el arranque de grupos (tokens) consecutivos
+METRICS_PATH = "/metrics"
+
+
+@dataclass(frozen=True, slots=True)
+class AssetSpec:
+    """Asset a consultar, con su token y el factor de participación a aplicar."""
+
+    asset_id: str
+    token: str
+    share_factor: float = 1.0
+
+
+@dataclass(slots=True)
+class AssetState:
+    """Última lectura y contadores de un asset."""
+
+    sample: Optional[PowerSample] = None
+    fetched_at: float = 0.0
+    error: Optional[str] = None
+    polls: int = 0
+    failures: int = 0
+    duplicates: int = 0
+
+
+def parse_assets(
+    lines: Iterable[str], default_token: Optional[str], default_factor: float = 1.0
+) -> list[AssetSpec]:
+    """Lee líneas ``asset_id[,token[,share_factor]]`` (``#`` para comentarios)."""
+    specs: dict[tuple[str, str], AssetSpec] = {}
+    for number, line in enumerate(lines, start=1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        token = fields[1] if len(fields) > 1 and fields[1] else default_token
+        if not token:
+            raise ValueError(f"Línea {number}: falta el token de {fields[0]} y no hay uno por defecto")
+        factor = float(fields[2]) if len(fields) > 2 and fields[2] else default_factor
+        specs[(fields[0], token)] = AssetSpec(fields[0], token, factor)
+    return list(specs.values())
+
+
+def _mask(token: str) -> str:
+    return f"…{token[-4:]}"
+
+
+def _label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class JsonLinesSink:
+    """Añade una línea JSON por cada muestra nueva (``-`` = salida estándar)."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = asyncio.Lock()
+
+    def _write(self, lines: list[str]) -> None:
+        if self._path == "-":
+            sys.stdout.write("".join(lines))
+            sys.stdout.flush()
+            return
+        with open(self._path, "a", encoding="utf-8") as handle:
+            handle.write("".join(lines))
+
+    async def async_write(self, records: list[dict[str, Any]]) -> None:
+        if not records:
+            return
+        lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in records]
+        # La escritura a disco va a un hilo para no frenar el bucle; el lock mantiene el orden
+        async with self._lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, lines)
+
+
+class _TokenGroup:
+    """Assets de un mismo token: un cliente, un presupuesto y una cadencia."""
+
+    __slots__ = ("token", "client", "assets", "cadence")
+
+    def __init__(self, token: str, client: SentinelClient, assets: list[AssetSpec]) -> None:
+        self.token = token
+        self.client = client
+        self.assets = assets
+        # Cadencia del primer asset: los de una misma cuenta suelen publicar a la vez
+        self.cadence = PublishCadence()
+
+
+class SentinelExporter:
+    """Consulta los assets por grupos de token y guarda la última lectura de cada uno."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        base_url: str,
+        specs: list[AssetSpec],
+        interval: float = DEFAULT_INTERVAL,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        timings: Optional[RequestTimings] = None,
+        sink: Optional[JsonLinesSink] = None,
+    ) -> None:
+        self.interval = interval
+        self.timings = timings or RequestTimings()
+        self._sink = sink
+        self.breaker = CircuitBreaker(urlparse(base_url).netloc or base_url)
+        # Todos los tokens van al mismo host: el límite de concurrencia es común, como en el registro
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.states: dict[tuple[str, str], AssetState] = {
+            (spec.token, spec.asset_id): AssetState() for spec in specs
+        }
+        by_token: dict[str, list[AssetSpec]] = {}
+        for spec in specs:
+            by_token.setdefault(spec.token, []).append(spec)
+        self.groups = [
+            _TokenGroup(
+                token,
+                SentinelClient(
+                    session, base_url, token, max_concurrency, timings=self.timings,
+                    breaker=self.breaker, budget=RateBudget(f"token {_mask(token)}"),
+                    semaphore=self.semaphore,
+                ),
+                assets,
+            )
+            for token, assets in by_token.items()
+        ]
+        for group in self.groups:
+            group.client.budget.register(group, len(group.assets), interval)
+
+    async def poll_group(self, group: _TokenGroup) -> float:
+        """Consulta todos los assets del grupo; devuelve los segundos hasta la siguiente ronda."""
+        results = await group.client.fetch_power_instant_many([spec.asset_id for spec in group.assets])
+        now = time.time()
+        records = []
+        successes = 0
+        for index, spec in enumerate(group.assets):
+            state = self.states[(spec.token, spec.asset_id)]
+            result = results[spec.asset_id]
+            state.polls += 1
+            if isinstance(result, BaseException):
+                state.failures += 1
+                state.error = str(result) or type(result).__name__
+                continue
+            successes += 1
+            previous = state.sample
+            state.sample, state.fetched_at, state.error = result, now, None
+            if index == 0 and result.timestamp is not None:
+                group.cadence.observe(result.timestamp.timestamp(), now)
+            if previous is not None and result.timestamp is not None and result.timestamp == previous.timestamp:
+                state.duplicates += 1
+                continue
+            records.append({
+                "asset_id": spec.asset_id,
+                "time": result.timestamp.isoformat() if result.timestamp else None,
+                "fetched_at": _iso(now),
+                "power_w": round(result.power * spec.share_factor, 1),
+                "raw_power_w": result.power,
+                "source": result.source,
+            })
+        if self._sink is not None:
+            await self._sink.async_write(records)
+
+        if not successes:
+            # Ronda fallida: reintentar antes, respetando el circuito y la cuota
+            return min(
+                self.interval,
+                max(RETRY_MIN, self.breaker.retry_in(), group.client.budget.wait_time(len(group.assets))),
+            )
+        budget = group.client.budget
+        slowdown = budget.slowdown()
+        wait = budget.wait_time(len(group.assets))
+        if slowdown > 1 or wait > 0:
+            # Falta cuota (o hubo 429 recientes): alargar y esperar al turno del grupo
+            delay = max(self.interval * slowdown, wait)
+        else:
+            aligned = group.cadence.align(now, self.interval)
+            if aligned is not None:
+                return aligned
+            delay = self.interval
+        slot = budget.next_slot(group, delay)
+        return slot if slot is not None else delay
+
+    async def _run_group(self, group: _TokenGroup, start_delay: float) -> None:
+        await asyncio.sleep(start_delay)
+        while True:
+            try:
+                delay = await self.poll_group(group)
+            except Exception:  # noqa: BLE001 - un fallo inesperado no debe parar el resto
+                _LOGGER.exception("Error consultando los assets del token %s", _mask(group.token))
+                delay = RETRY_MIN
+            _LOGGER.debug("Token %s: próxima ronda en %.0f s", _mask(group.token), delay)
+            await asyncio.sleep(delay)
+
+    async def run(self) -> None:
+        """Consulta todos los grupos hasta que se cancele, escalonando su arranque."""
+        window = max(self.interval, START_STAGGER)
+        await asyncio.gather(*(
+            self._run_group(group, (index * START_STAGGER) % window)
+            for index, group in enumerate(self.groups)
+        ))
+
+    def render_metrics(self) -> str:
+        """Métricas en formato de texto de Prometheus."""
+        now = time.time()
+        out: list[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        def sample(name: str, labels: dict, value: Any) -> None:
+            label_text = ",".join(f'{key}="{_label(val)}"' for key, val in labels.items())
+            out.append(f"{name}{{{label_text}}} {value}")
+
+        def family(name: str, kind: str, help_text: str, samples: Iterable[tuple[dict, Any]]) -> None:
+            header(name, kind, help_text)
+            for labels, value in samples:
+                if value is not None:
+                    sample(name, labels, value)
+
+        assets = [
+            (spec, self.states[(spec.token, spec.asset_id)]) for group in self.groups for spec in group.assets
+        ]
+
+        def asset_labels(spec: AssetSpec) -> dict[str, str]:
+            return {"asset": spec.asset_id, "token": _mask(spec.token)}
+
+        family("sentinel_power_watts", "gauge", "Potencia con el factor de participación aplicado", (
+            (asset_labels(spec), round(state.sample.power * spec.share_factor, 1))
+            for spec, state in assets if state.sample is not None
+        ))
+        family("sentinel_sample_timestamp_seconds", "gauge", "Timestamp de la última muestra publicada", (
+            (asset_labels(spec), state.sample.timestamp.timestamp())
+            for spec, state in assets if state.sample is not None and state.sample.timestamp is not None
+        ))
+        family("sentinel_sample_age_seconds", "gauge", "Segundos desde la última lectura correcta", (
+            (asset_labels(spec), round(now - state.fetched_at, 1))
+            for spec, state in assets if state.sample is not None
+        ))
+        family("sentinel_up", "gauge", "1 si la última consulta del asset fue correcta", (
+            (asset_labels(spec), 0 if state.error or state.sample is None else 1) for spec, state in assets
+        ))
+        family("sentinel_polls_total", "counter", "Consultas hechas por asset", (
+            (asset_labels(spec), state.polls) for spec, state in assets
+        ))
+        family("sentinel_poll_failures_total", "counter", "Consultas fallidas por asset", (
+            (asset_labels(spec), state.failures) for spec, state in assets
+        ))
+        family("sentinel_duplicate_samples_total", "counter", "Consultas que devolvieron la muestra anterior", (
+            (asset_labels(spec), state.duplicates) for spec, state in assets
+        ))
+
+        clients = [(group, group.client.get_metrics()) for group in self.groups]
+        family("sentinel_client_requests_total", "counter", "Llamadas a la API por token", (
+            ({"token": _mask(group.token)}, metrics["total_requests"]) for group, metrics in clients
+        ))
+        family("sentinel_client_retries_total", "counter", "Reintentos por token", (
+            ({"token": _mask(group.token)}, metrics["total_retries"]) for group, metrics in clients
+        ))
+        family("sentinel_budget_slowdown", "gauge", "Factor con el que se alargan los intervalos por la cuota", (
+            ({"token": _mask(group.token)}, metrics["budget"]["slowdown"]) for group, metrics in clients
+        ))
+        family("sentinel_circuit_open", "gauge", "1 si el circuito del host está abierto", (
+            ({"host": self.breaker.name}, int(self.breaker.state != "closed")),
+        ))
+        # Un summary necesita, además de los cuantiles, las series ``_sum`` y ``_count``
+        name = "sentinel_request_duration_seconds"
+        header(name, "summary", "Duración total de las peticiones")
+        for endpoint in self.timings.summary():
+            histogram = self.timings.get(endpoint, PHASE_TOTAL)
+            if histogram is None or not histogram.count:
+                continue
+            for quantile in (0.5, 0.95, 0.99):
+                sample(name, {"endpoint": endpoint, "quantile": quantile}, round(histogram.percentile(quantile), 4))
+            sample(f"{name}_sum", {"endpoint": endpoint}, round(histogram.total, 4))
+            sample(f"{name}_count", {"endpoint": endpoint}, histogram.count)
+        return "\n".join(out) + "\n"
+
+
+async def _serve_metrics(exporter: SentinelExporter, listen: str) -> web.AppRunner:
+    host, _, port = listen.rpartition(":")
+
+    async def handle(_request: web.Request) -> web.Response:
+        return web.Response(text=exporter.render_metrics(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get(METRICS_PATH, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host or "0.0.0.0", int(port)).start()
+    _LOGGER.info("Métricas en http://%s:%s%s", host or "0.0.0.0", port, METRICS_PATH)
+    return runner
+
+
+def _read_specs(args: argparse.Namespace) -> list[AssetSpec]:
+    lines = list(args.asset or [])
+    if args.assets_file:
+        with (sys.stdin if args.assets_file == "-" else open(args.assets_file, encoding="utf-8")) as handle:
+            lines.extend(handle.readlines())
+    return parse_assets(lines, args.token, args.share_factor)
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Exportador de potencia de Sentinel Solar sin Home Assistant")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--token", default=os.environ.get("SENTINEL_TOKEN"),
+                        help="Token por defecto (o variable SENTINEL_TOKEN)")
+    parser.add_argument("--asset", action="append", help="asset_id[,token[,share_factor]]; se puede repetir")
+    parser.add_argument("--assets-file", help="Fichero con un asset por línea (- = entrada estándar)")
+    parser.add_argument("--share-factor", type=float, default=1.0)
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Segundos entre rondas")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help="Peticiones simultáneas al host, entre todos los tokens")
+    parser.add_argument("--listen", help="host:puerto del endpoint de métricas (p. ej. 0.0.0.0:9464)")
+    parser.add_argument("--output", help="Fichero JSON Lines al que añadir las muestras (- = stdout)")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+    if not args.listen and not args.output:
+        parser.error("indica --listen, --output o ambos")
+    return args
+
+
+async def async_main(args: argparse.Namespace) -> int:
+    try:
+        specs = _read_specs(args)
+    except (OSError, ValueError) as err:
+        _LOGGER.error("No se pudo leer la lista de assets: %s", err)
+        return 2
+    if not specs:
+        _LOGGER.error("No hay assets que consultar")
+        return 2
+
+    timings = RequestTimings()
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit_per_host=max(1, args.concurrency) * 2, ttl_dns_cache=300),
+        trace_configs=[create_trace_config(timings)],
+    )
+    exporter = SentinelExporter(
+        session, args.base_url, specs, args.interval, args.concurrency, timings,
+        JsonLinesSink(args.output) if args.output else None,
+    )
+    runner = await _serve_metrics(exporter, args.listen) if args.listen else None
+    _LOGGER.info("Consultando %d assets de %d tokens cada %.0f s", len(specs), len(exporter.groups), args.interval)
+
+    task = asyncio.ensure_future(exporter.run())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C llega como KeyboardInterrupt
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+        await session.close()
+    return 0
+
+
+def run(argv: Optional[list[str]] = None) -> int:
+    """Punto de entrada de la línea de comandos."""
+    args = _parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        return asyncio.run(async_main(args))
+    except KeyboardInterrupt:
+        return 0
@@ -0,0 +1,172 @@
+"""Integración numérica de series de potencia (W) a energía (kWh).
+
+Las muestras son tuplas ``(epoch_segundos, vatios)`` ordenadas por tiempo. Todo
+se resuelve en una sola pasada sobre la serie, sin dependencias de Home Assistant.
+"""
+from __future__ import annotations
+from array import array
+from typing import Iterable, Optional, Sequence
+
+Sample = tuple[float, float]
+
+SECONDS_PER_HOUR = 3600.0
+RING_CAPACITY = 16  # Muestras recientes que se conservan para integrar
+
+METHOD_LEFT = "left"
+METHOD_RIGHT = "right"
+METHOD_TRAPEZOIDAL = "trapezoidal"
+METHOD_SIMPSON = "simpson"
+INTEGRATION_METHODS = [METHOD_LEFT, METHOD_RIGHT, METHOD_TRAPEZOIDAL, METHOD_SIMPSON]
+
+
+def trapezoid_kwh(samples: Sequence[Sample]) -> float:
+    """Energía total (kWh) de la serie por la regla del trapecio."""
+    total_ws = 0.0
+    for (t0, p0), (t1, p1) in zip(samples, samples[1:]):
+        if t1 > t0:
+            total_ws += (p0 + p1) * 0.5 * (t1 - t0)
+    return total_ws / SECONDS_PER_HOUR / 1000.0
+
+
+def hourly_trapezoid_kwh(samples: Sequence[Sample]) -> list[tuple[float, float]]:
+    """Energía (kWh) por hora UTC, repartiendo cada trapecio entre las horas que cruza.
+
+    Devuelve ``[(inicio_hora_epoch, kWh), ...]`` ordenado; la potencia dentro de un
+    tramo se interpola linealmente para cortar exactamente en el cambio de hora.
+    """
+    buckets: dict[float, float] = {}
+    for (t0, p0), (t1, p1) in zip(samples, samples[1:]):
+        if t1 <= t0:
+            continue
+        slope = (p1 - p0) / (t1 - t0)
+        a, pa = t0, p0
+        while a < t1:
+            hour = a - (a % SECONDS_PER_HOUR)
+            b = min(hour + SECONDS_PER_HOUR, t1)
+            pb = p0 + slope * (b - t0)
+            buckets[hour] = buckets.get(hour, 0.0) + (pa + pb) * 0.5 * (b - a)
+            a, pa = b, pb
+    return [(hour, ws / SECONDS_PER_HOUR / 1000.0) for hour, ws in sorted(buckets.items())]
+
+
+def to_samples(points: Iterable[tuple]) -> list[Sample]:
+    """Convierte pares ``(datetime, W)`` a muestras ``(epoch, W)``."""
+    return [(ts.timestamp(), float(power)) for ts, power in points]
+
+
+class SampleRing:
+    """Buffer circular de tamaño fijo con muestras ``(epoch, W)`` sobre ``array('d')``."""
+
+    __slots__ = ("_ts", "_power", "_next", "_size", "capacity")
+
+    def __init__(self, capacity: int = RING_CAPACITY) -> None:
+        self.capacity = capacity
+        self._ts = array("d", bytes(8 * capacity))
+        self._power = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, ts: float, power_w: float) -> None:
+        self._ts[self._next] = ts
+        self._power[self._next] = power_w
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def clear(self) -> None:
+        self._next = 0
+        self._size = 0
+
+    def last(self, n: int = 1) -> list[Sample]:
+        """Las ``n`` muestras más recientes, de la más antigua a la más nueva."""
+        n = min(n, self._size)
+        idx = [(self._next - n + i) % self.capacity for i in range(n)]
+        return [(self._ts[i], self._power[i]) for i in idx]
+
+    def to_list(self) -> list[list[float]]:
+        """Serializa el contenido (para guardarlo entre reinicios)."""
+        return [[ts, power] for ts, power in self.last(self._size)]
+
+    def extend(self, samples: Iterable[Sequence[float]]) -> None:
+        for ts, power in samples:
+            self.append(float(ts), float(power))
+
+
+def _quadratic_tail_ws(s0: Sample, s1: Sample, s2: Sample) -> float:
+    """Integral (W·s) sobre ``[t1, t2]`` de la parábola que pasa por las tres muestras.
+
+    Se usa la regla de Simpson sobre el propio polinomio (exacta para grado 2),
+    evaluando el punto medio por interpolación de Lagrange con pasos irregulares.
+    """
+    (t0, p0), (t1, p1), (t2, p2) = s0, s1, s2
+    if not (t0 < t1 < t2):
+        return (p1 + p2) * 0.5 * (t2 - t1)
+    tm = (t1 + t2) * 0.5
+    pm = (
+        p0 * (tm - t1) * (tm - t2) / ((t0 - t1) * (t0 - t2))
+        + p1 * (tm - t0) * (tm - t2) / ((t1 - t0) * (t1 - t2))
+        + p2 * (tm - t0) * (tm - t1) / ((t2 - t0) * (t2 - t1))
+    )
+    ws = (t2 - t1) / 6.0 * (p1 + 4.0 * pm + p2)
+    if ws < 0 and min(p0, p1, p2) >= 0:
+        # La parábola no debe inventar consumo en una serie de producción
+        return 0.0
+    return ws
+
+
+class EnergyIntegrator:
+    """Integra muestras sucesivas de potencia con el método elegido.
+
+    ``add`` devuelve la energía (kWh) del tramo entre la muestra anterior y la
+    nueva. Sin muestra anterior en el buffer (p. ej. tras un reinicio) se usa
+    ``prev_ts`` con rectángulo derecho, como hacía la integración original.
+    """
+
+    __slots__ = ("method", "ring")
+
+    def __init__(self, method: str = METHOD_RIGHT, capacity: int = RING_CAPACITY) -> None:
+        self.method = method if method in INTEGRATION_METHODS else METHOD_RIGHT
+        self.ring = SampleRing(capacity)
+
+    def add(
+        self,
+        ts: float,
+        power_w: float,
+        prev_ts: Optional[float] = None,
+        max_dt: Optional[float] = None,
+    ) -> float:
+        history = self.ring.last(2)
+        if history and history[-1][0] >= ts:
+            return 0.0
+
+        if history and (prev_ts is None or abs(history[-1][0] - prev_ts) < 1e-6):
+            prev = history[-1]
+        else:
+            # El buffer no corresponde con la muestra anterior conocida: empezar de nuevo
+            self.ring.clear()
+            history = []
+            prev = (prev_ts, power_w) if prev_ts is not None else None
+
+        self.ring.append(ts, power_w)
+        if prev is None or prev[0] >= ts:
+            return 0.0
+
+        dt = ts - prev[0]
+        if max_dt is not None and dt > max_dt:
+            # Tramo demasiado largo: estimación acotada y se descarta el historial
+            self.ring.clear()
+            self.ring.append(ts, power_w)
+            return power_w * max_dt / SECONDS_PER_HOUR / 1000.0
+
+        if self.method == METHOD_RIGHT or not history:
+            ws = power_w * dt
+        elif self.method == METHOD_LEFT:
+            ws = prev[1] * dt
+        elif self.method == METHOD_SIMPSON and len(history) == 2:
+            ws = _quadratic_tail_ws(history[0], prev, (ts, power_w))
+        else:
+            ws = (prev[1] + power_w) * 0.5 * dt
+        return ws / SECONDS_PER_HOUR / 1000.0
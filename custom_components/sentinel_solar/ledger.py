@@ -0,0 +1,80 @@
+from __future__ import annotations
+from typing import Any, Optional
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, DATA_ENERGY_LEDGER
+from .storage import DebouncedSave
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.energy_ledger"
+STORAGE_VERSION = 1
+SAVE_DELAY = 30  # Segundos sin cambios antes de escribir (agrupa las actualizaciones)
+
+
+class EnergyLedger:
+    """Registro persistente (``Store``) del estado de integración de cada sensor de energía.
+
+    Guarda por sensor el total acumulado, el último timestamp de la API, las
+    muestras recientes del integrador y los contadores por periodo. Las
+    escrituras se agrupan para todos los sensores en un único fichero que
+    ``Store`` reemplaza de forma atómica, así que tras un apagado brusco se pierde
+    como mucho ``MAX_SAVE_DELAY`` segundos de cambios y nunca se lee un fichero a medias.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._records: dict[str, dict[str, Any]] = {}
+        self._load_task: Optional[asyncio.Task] = None
+        self._save = DebouncedSave(self._store, self._data_to_save, SAVE_DELAY)
+
+    async def async_load(self) -> None:
+        """Carga el registro desde disco una sola vez, aunque varios sensores lo pidan a la vez."""
+        if self._load_task is None:
+            self._load_task = self._hass.async_create_task(self._async_load())
+        await self._load_task
+
+    async def _async_load(self) -> None:
+        stored = await self._store.async_load()
+        if isinstance(stored, dict):
+            self._records = stored.get("sensors") or {}
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """Último punto de control guardado para el sensor ``key``."""
+        return self._records.get(key)
+
+    @callback
+    def async_update(self, key: str, record: dict[str, Any]) -> None:
+        """Anota un nuevo punto de control y programa la escritura agrupada."""
+        previous = self._records.get(key)
+        record["seq"] = (previous.get("seq", 0) if previous else 0) + 1
+        record["updated_at"] = time.time()
+        self._records[key] = record
+        self._save.schedule()
+
+    @callback
+    def async_remove_prefix(self, prefix: str) -> None:
+        """Elimina los registros de una entrada (sus unique_id empiezan por el entry_id)."""
+        keys = [key for key in self._records if key.startswith(prefix)]
+        for key in keys:
+            del self._records[key]
+        if keys:
+            self._save.schedule()
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"sensors": self._records}
+
+
+async def async_get_energy_ledger(hass: HomeAssistant) -> EnergyLedger:
+    """Devuelve el registro de energía del proceso, cargándolo la primera vez."""
+    ledger = hass.data.get(DATA_ENERGY_LEDGER)
+    if ledger is None:
+        ledger = hass.data[DATA_ENERGY_LEDGER] = EnergyLedger(hass)
+    await ledger.async_load()
+    return ledger
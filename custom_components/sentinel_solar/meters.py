@@ -0,0 +1,129 @@
+"""Contadores de energía por periodo (hora, día, semana y mes) en hora local.
+
+Se alimentan con cada incremento de energía del sensor de energía, sin entidades
+auxiliares escuchando cambios de estado. Cada suma es O(1): los límites de los
+periodos se precalculan como epoch y sólo se recalculan al cruzar uno. No
+depende de Home Assistant.
+"""
+from __future__ import annotations
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from typing import Any, Callable, Optional
+
+PERIOD_HOUR = "hour"
+PERIOD_DAY = "day"
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+PERIODS = (PERIOD_HOUR, PERIOD_DAY, PERIOD_WEEK, PERIOD_MONTH)
+
+
+def period_start(period: str, moment: datetime) -> datetime:
+    """Inicio (en la zona de ``moment``) del periodo que contiene ``moment``."""
+    if period == PERIOD_HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.date()
+    if period == PERIOD_WEEK:
+        day -= timedelta(days=day.weekday())  # Semanas de lunes a domingo
+    elif period == PERIOD_MONTH:
+        day = day.replace(day=1)
+    return datetime.combine(day, time(), tzinfo=moment.tzinfo)
+
+
+def next_period_start(period: str, start: datetime) -> datetime:
+    """Inicio del periodo siguiente, respetando los cambios de horario."""
+    if period == PERIOD_HOUR:
+        # En UTC para que las horas duren siempre 60 minutos aunque cambie el horario
+        return (start.astimezone(timezone.utc) + timedelta(hours=1)).astimezone(start.tzinfo)
+    day = start.date()
+    if period == PERIOD_DAY:
+        day += timedelta(days=1)
+    elif period == PERIOD_WEEK:
+        day += timedelta(days=7)
+    else:
+        day = day.replace(year=day.year + day.month // 12, month=day.month % 12 + 1, day=1)
+    return datetime.combine(day, time(), tzinfo=start.tzinfo)
+
+
+class PeriodMeters:
+    """Energía (kWh) acumulada en la hora, el día, la semana y el mes en curso."""
+
+    __slots__ = ("_tz", "_values", "_starts", "_ends", "_next_roll", "_listeners")
+
+    def __init__(self, tz: tzinfo, now: Optional[datetime] = None) -> None:
+        self._tz = tz
+        self._values = dict.fromkeys(PERIODS, 0.0)
+        self._starts: dict[str, float] = {}
+        self._ends: dict[str, float] = {}
+        self._next_roll = 0.0
+        self._listeners: list[Callable[[], None]] = []
+        moment = (now or datetime.now(timezone.utc)).astimezone(tz)
+        for period in PERIODS:
+            self._reset(period, moment)
+        self._next_roll = min(self._ends.values())
+
+    def _reset(self, period: str, moment: datetime) -> None:
+        start = period_start(period, moment)
+        self._starts[period] = start.timestamp()
+        self._ends[period] = next_period_start(period, start).timestamp()
+        self._values[period] = 0.0
+
+    def roll(self, ts: float) -> bool:
+        """Reinicia los periodos que hayan terminado en ``ts``; ``True`` si hubo alguno."""
+        if ts < self._next_roll:
+            return False
+        moment = datetime.fromtimestamp(ts, self._tz)
+        for period in PERIODS:
+            if ts >= self._ends[period]:
+                self._reset(period, moment)
+        self._next_roll = min(self._ends.values())
+        return True
+
+    def add(self, kwh: float, ts: float) -> None:
+        """Suma la energía de un tramo que termina en ``ts`` (epoch) a sus periodos.
+
+        La energía de un periodo ya cerrado (p. ej. al rellenar un hueco) sólo
+        cuenta en los periodos más largos que aún la incluyen.
+        """
+        self.roll(ts)
+        for period in PERIODS:
+            if ts > self._starts[period]:
+                self._values[period] += kwh
+
+    def value(self, period: str) -> float:
+        return self._values[period]
+
+    def start(self, period: str) -> datetime:
+        return datetime.fromtimestamp(self._starts[period], timezone.utc)
+
+    def next_reset(self) -> datetime:
+        """Momento (UTC) en que termina el primer periodo en curso."""
+        return datetime.fromtimestamp(self._next_roll, timezone.utc)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            period: {"start": self._starts[period], "kwh": self._values[period]}
+            for period in PERIODS
+        }
+
+    def restore(self, data: Any) -> None:
+        """Recupera los valores guardados de los periodos que siguen en curso."""
+        if not isinstance(data, dict):
+            return
+        for period in PERIODS:
+            stored = data.get(period)
+            if not isinstance(stored, dict):
+                continue
+            try:
+                start, kwh = float(stored["start"]), float(stored["kwh"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if abs(start - self._starts[period]) < 1:
+                self._values[period] = kwh
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Registra una función a la que avisar cuando cambian los contadores."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
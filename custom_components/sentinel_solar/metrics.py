@@ -0,0 +1,142 @@
+"""Histogramas de latencia por endpoint y fase HTTP, con memoria acotada.
+
+No depende de Home Assistant: lo usa ``SentinelClient`` y se alimenta con un
+``aiohttp.TraceConfig`` que separa DNS, conexión, primer byte, cuerpo y decodificación.
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import re
+
+import aiohttp
+
+# Límites superiores de los cubos (s): progresión geométrica de 1 ms a ~2 min
+_BUCKET_GROWTH = 1.25
+BUCKET_BOUNDS: Tuple[float, ...] = tuple(0.001 * _BUCKET_GROWTH ** i for i in range(53))
+
+PHASE_DNS = "dns"
+PHASE_CONNECT = "connect"  # TCP + TLS: aiohttp no separa el handshake TLS
+PHASE_TTFB = "ttfb"  # Desde el envío de la petición hasta recibir las cabeceras
+PHASE_BODY = "body"
+PHASE_DECODE = "decode"
+PHASE_TOTAL = "total"  # Llamada completa, incluidos reintentos y esperas
+
+_ASSET_ID_RE = re.compile(r"^(/api/asset/)[^/]+")
+
+
+def endpoint_key(path: str) -> str:
+    """Normaliza un path para agrupar métricas: sin query y sin el ID del asset."""
+    return _ASSET_ID_RE.sub(r"\1{id}", path.split("?", 1)[0])
+
+
+class LatencyHistogram:
+    """Histograma de cubos logarítmicos fijos; percentiles con error acotado al 25 %."""
+
+    __slots__ = ("_counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self._counts = array("L", bytes(array("L").itemsize * (len(BUCKET_BOUNDS) + 1)))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        self._counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentil ``q`` (0..1) en segundos, interpolando dentro del cubo."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self._counts):
+            if not bucket_count:
+                continue
+            if seen + bucket_count >= rank:
+                low = BUCKET_BOUNDS[idx - 1] if idx > 0 else 0.0
+                high = BUCKET_BOUNDS[idx] if idx < len(BUCKET_BOUNDS) else self.max
+                fraction = (rank - seen) / bucket_count
+                return min(low + (high - low) * fraction, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "p50_ms": ms(self.percentile(0.50)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "p99_ms": ms(self.percentile(0.99)),
+            "max_ms": ms(self.max) if self.count else None,
+        }
+
+
+class RequestTimings:
+    """Histogramas por ``(endpoint, fase)``."""
+
+    def __init__(self) -> None:
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def record(self, endpoint: str, phase: str, seconds: float) -> None:
+        key = (endpoint, phase)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def get(self, endpoint: str, phase: str = PHASE_TOTAL) -> Optional[LatencyHistogram]:
+        return self._histograms.get((endpoint, phase))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        result: Dict[str, Dict[str, Any]] = {}
+        for (endpoint, phase), histogram in sorted(self._histograms.items()):
+            result.setdefault(endpoint, {})[phase] = histogram.summary()
+        return result
+
+
+def create_trace_config(timings: RequestTimings) -> aiohttp.TraceConfig:
+    """``TraceConfig`` que registra DNS, conexión y tiempo hasta el primer byte."""
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    async def on_request_start(_session, ctx: SimpleNamespace, params) -> None:
+        ctx.endpoint = endpoint_key(params.url.path)
+        ctx.request_start = _now()
+
+    async def on_dns_start(_session, ctx: SimpleNamespace, _params) -> None:
+        ctx.dns_start = _now()
+
+    async def on_dns_end(_session, ctx: SimpleNamespace, _params) -> None:
+        if hasattr(ctx, "dns_start"):
+            timings.record(ctx.endpoint, PHASE_DNS, _now() - ctx.dns_start)
+
+    async def on_connect_start(_session, ctx: SimpleNamespace, _params) -> None:
+        ctx.connect_start = _now()
+
+    async def on_connect_end(_session, ctx: SimpleNamespace, _params) -> None:
+        if hasattr(ctx, "connect_start"):
+            timings.record(ctx.endpoint, PHASE_CONNECT, _now() - ctx.connect_start)
+
+    async def on_request_end(_session, ctx: SimpleNamespace, _params) -> None:
+        # on_request_end se dispara al recibir las cabeceras de la respuesta
+        timings.record(ctx.endpoint, PHASE_TTFB, _now() - ctx.request_start)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connect_start)
+    trace_config.on_connection_create_end.append(on_connect_end)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
@@ -0,0 +1,109 @@
+"""Estimación de la potencia entre consultas a partir de la posición del sol.
+
+Entre dos lecturas reales se supone que el índice de cielo despejado (potencia
+medida / curva teórica de cielo despejado) se mantiene, y se escala con la
+curva del momento. No depende de Home Assistant.
+"""
+from __future__ import annotations
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+import math
+
+NOWCAST_WINDOW = 6  # Lecturas recientes usadas para el índice de cielo despejado
+NOWCAST_HORIZON = 3 * 3600  # No estimar más allá de este tiempo desde la última lectura (s)
+MIN_CLEAR_SKY = 0.05  # Por debajo (sol muy bajo) el índice no es fiable
+
+
+def solar_elevation(latitude: float, longitude: float, ts: float) -> float:
+    """Elevación del sol (grados) en ``ts`` (epoch), con las ecuaciones aproximadas de NOAA."""
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    hour = moment.hour + moment.minute / 60 + moment.second / 3600
+    gamma = 2 * math.pi / 365 * (moment.timetuple().tm_yday - 1 + (hour - 12) / 24)
+    eqtime = 229.18 * (
+        0.000075
+        + 0.001868 * math.cos(gamma)
+        - 0.032077 * math.sin(gamma)
+        - 0.014615 * math.cos(2 * gamma)
+        - 0.040849 * math.sin(2 * gamma)
+    )
+    declination = (
+        0.006918
+        - 0.399912 * math.cos(gamma)
+        + 0.070257 * math.sin(gamma)
+        - 0.006758 * math.cos(2 * gamma)
+        + 0.000907 * math.sin(2 * gamma)
+        - 0.002697 * math.cos(3 * gamma)
+        + 0.00148 * math.sin(3 * gamma)
+    )
+    true_solar_minutes = hour * 60 + eqtime + 4 * longitude
+    hour_angle = math.radians(true_solar_minutes / 4 - 180)
+    lat = math.radians(latitude)
+    cos_zenith = math.sin(lat) * math.sin(declination) + math.cos(lat) * math.cos(
+        declination
+    ) * math.cos(hour_angle)
+    return math.degrees(math.asin(max(-1.0, min(1.0, cos_zenith))))
+
+
+def clear_sky(elevation: float) -> float:
+    """Irradiancia relativa de cielo despejado (0..~0.75) para una elevación en grados.
+
+    Modelo de Meinel con la masa de aire de Kasten-Young: basta para la forma de la
+    curva, la escala la pone el índice medido.
+    """
+    if elevation <= 0:
+        return 0.0
+    sin_elevation = math.sin(math.radians(elevation))
+    air_mass = 1 / (sin_elevation + 0.50572 * (elevation + 6.07995) ** -1.6364)
+    return sin_elevation * 0.7 ** (air_mass ** 0.678)
+
+
+class Nowcaster:
+    """Estima la potencia (W, sin factor) entre lecturas reales de un asset."""
+
+    __slots__ = ("latitude", "longitude", "_history")
+
+    def __init__(self, latitude: float, longitude: float, window: int = NOWCAST_WINDOW) -> None:
+        self.latitude = latitude
+        self.longitude = longitude
+        self._history: deque[tuple[float, float, float]] = deque(maxlen=window)
+
+    def _clear_sky_at(self, ts: float) -> float:
+        return clear_sky(solar_elevation(self.latitude, self.longitude, ts))
+
+    def record(self, ts: float, power_w: float) -> None:
+        """Añade una lectura real (se ignoran las repetidas o desordenadas)."""
+        if self._history and ts <= self._history[-1][0]:
+            return
+        self._history.append((ts, power_w, self._clear_sky_at(ts)))
+
+    @property
+    def last_measurement(self) -> Optional[float]:
+        """Epoch de la última lectura real."""
+        return self._history[-1][0] if self._history else None
+
+    def clear_sky_index(self) -> Optional[float]:
+        """Índice de cielo despejado reciente, ponderando más las lecturas nuevas."""
+        total = weights = 0.0
+        for weight, (_ts, power_w, reference) in enumerate(self._history, start=1):
+            if reference >= MIN_CLEAR_SKY:
+                total += weight * power_w / reference
+                weights += weight
+        return total / weights if weights else None
+
+    def estimate(self, ts: float) -> Optional[float]:
+        """Potencia estimada en ``ts``; ``None`` si no hay base suficiente para estimar."""
+        if not self._history:
+            return None
+        last_ts, last_power, _reference = self._history[-1]
+        if ts <= last_ts or ts - last_ts > NOWCAST_HORIZON:
+            return None
+        reference = self._clear_sky_at(ts)
+        if reference <= 0:
+            # Sol bajo el horizonte: sin producción
+            return min(last_power, 0.0)
+        index = self.clear_sky_index()
+        if index is None:
+            # Amanecer/atardecer sin lecturas fiables: mantener la última
+            return last_power
+        return max(index * reference, min(last_power, 0.0))
@@ -4,11 +4,10 @@ from typing import Any, Optional
 from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
 
 from .const import (
     DOMAIN, CONF_SHARE_FACTOR, DEFAULT_SHARE_FACTOR,
-    CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES, DEFAULT_BASE_URL
+    CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES
 )
 
 
@@ -38,21 +37,7 @@ class ShareFactorNumber(NumberEntity):
         self._data = data
         self._attr_name = "Factor de Participación"
         self._attr_unique_id = f"{entry.entry_id}_share_factor"
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information."""
-        asset_info = self._data.get("asset_info", {})
-        asset_name = asset_info.get("name") or asset_info.get("assetName") or self._data.get("asset_general", "sentinel_solar")
-        
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            name=asset_name,
-            manufacturer="sentinel_solar (proyecto no oficial de Sentinel Solar)",
-            model=asset_info.get("type") or asset_info.get("assetType") or "Asset",
-            sw_version=asset_info.get("firmwareVersion") or asset_info.get("firmware_version"),
-            configuration_url=f"{self._entry.data.get('base_url', DEFAULT_BASE_URL)}",
-        )
+        self._attr_device_info = data["device_info"]
 
     @property
     def native_value(self) -> Optional[float]:
@@ -83,21 +68,7 @@ class UpdateIntervalNumber(NumberEntity):
         self._data = data
         self._attr_name = "Intervalo de Actualización"
         self._attr_unique_id = f"{entry.entry_id}_update_interval"
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information."""
-        asset_info = self._data.get("asset_info", {})
-        asset_name = asset_info.get("name") or asset_info.get("assetName") or self._data.get("asset_general", "sentinel_solar")
-        
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            name=asset_name,
-            manufacturer="sentinel_solar (proyecto no oficial de Sentinel Solar)",
-            model=asset_info.get("type") or asset_info.get("assetType") or "Asset",
-            sw_version=asset_info.get("firmwareVersion") or asset_info.get("firmware_version"),
-            configuration_url=f"{self._entry.data.get('base_url', DEFAULT_BASE_URL)}",
-        )
+        self._attr_device_info = data["device_info"]
 
     @property
     def native_value(self) -> Optional[int]:
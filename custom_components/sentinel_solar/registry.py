@@ -0,0 +1,174 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
+import asyncio
+import logging
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util.ssl import client_context
+
+from .api import MAX_CONCURRENT_REQUESTS, SentinelClient
+from .budget import RateBudget
+from .circuit import CircuitBreaker
+from .metrics import RequestTimings, create_trace_config
+from .const import DATA_CLIENTS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Pool de conexiones propio: pocas conexiones por host pero reutilizadas entre sondeos
+POOL_LIMIT_PER_HOST = 8
+KEEPALIVE_TIMEOUT = 120  # Segundos que se mantiene abierta una conexión ociosa
+DNS_CACHE_TTL = 300
+
+
+@dataclass
+class _SharedClient:
+    """Cliente compartido junto a su sesión y el número de usuarios activos."""
+
+    client: SentinelClient
+    session: aiohttp.ClientSession
+    refs: int = 0
+
+
+class SentinelClientRegistry:
+    """Registro de ``SentinelClient`` compartidos, uno por ``(base_url, token)``.
+
+    Todas las entradas y el config flow que usan las mismas credenciales
+    comparten cliente: mismo pool de conexiones keep-alive y agrupación de
+    peticiones idénticas en vuelo. El límite de concurrencia y el circuit breaker
+    son por host, aunque cambie el token; el presupuesto de peticiones es por
+    token, aunque cambie la URL.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._clients: dict[tuple[str, str], _SharedClient] = {}
+        # Un circuit breaker por host: si la API cae, cae para todos los tokens
+        self._breakers: dict[str, CircuitBreaker] = {}
+        # Un semáforo por host: varios tokens contra la misma API no suman sus límites
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        # Un presupuesto por token: la cuota la impone la API a cada token
+        self._budgets: dict[str, RateBudget] = {}
+        # Home Assistant no descarga las entradas al pararse: las sesiones se cierran aquí
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, self._async_close_all)
+
+    async def _async_close_all(self, _event: Event) -> None:
+        """Cierra las sesiones de todos los clientes al parar Home Assistant."""
+        clients, self._clients = self._clients, {}
+        for shared in clients.values():
+            await shared.session.close()
+
+    @staticmethod
+    def _key(base_url: str, token: str) -> tuple[str, str]:
+        return (base_url.rstrip("/"), token)
+
+    @staticmethod
+    def _host(base_url: str) -> str:
+        return urlparse(base_url).netloc or base_url
+
+    def _breaker(self, base_url: str) -> CircuitBreaker:
+        host = self._host(base_url)
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(host)
+        return breaker
+
+    def _semaphore(self, base_url: str) -> asyncio.Semaphore:
+        host = self._host(base_url)
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        return semaphore
+
+    def _budget(self, token: str) -> RateBudget:
+        budget = self._budgets.get(token)
+        if budget is None:
+            budget = self._budgets[token] = RateBudget(f"token …{token[-4:]}")
+        return budget
+
+    @callback
+    def async_acquire(self, base_url: str, token: str) -> SentinelClient:
+        """Obtiene (o crea) el cliente compartido y registra un usuario más."""
+        key = self._key(base_url, token)
+        shared = self._clients.get(key)
+        if shared is None:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=POOL_LIMIT_PER_HOST,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                ssl=client_context(),
+            )
+            # El TraceConfig reparte el tiempo de cada petición en DNS, conexión y primer byte
+            timings = RequestTimings()
+            session = aiohttp.ClientSession(
+                connector=connector, trace_configs=[create_trace_config(timings)]
+            )
+            client = SentinelClient(
+                session, key[0], token, timings=timings, breaker=self._breaker(key[0]),
+                budget=self._budget(token), semaphore=self._semaphore(key[0]),
+            )
+            shared = _SharedClient(client, session)
+            self._clients[key] = shared
+            _LOGGER.debug("Creado cliente compartido para %s", key[0])
+        shared.refs += 1
+        return shared.client
+
+    @callback
+    def async_get_client(self, base_url: str, token: str) -> SentinelClient:
+        """Devuelve el cliente compartido si existe, o uno temporal sin registrarlo.
+
+        Pensado para usos puntuales (config flow) que no deben mantener vivo el pool.
+        """
+        shared = self._clients.get(self._key(base_url, token))
+        if shared is not None:
+            return shared.client
+        return SentinelClient(
+            async_get_clientsession(self._hass), base_url, token,
+            breaker=self._breaker(base_url), budget=self._budget(token),
+            semaphore=self._semaphore(base_url),
+        )
+
+    @callback
+    def async_release(self, base_url: str, token: str) -> None:
+        """Libera un usuario del cliente y cierra la sesión cuando nadie lo usa."""
+        key = self._key(base_url, token)
+        shared = self._clients.get(key)
+        if shared is None:
+            return
+        shared.refs -= 1
+        if shared.refs <= 0:
+            del self._clients[key]
+            self._hass.async_create_task(shared.session.close())
+            _LOGGER.debug("Cerrado cliente compartido para %s", key[0])
+
+    @callback
+    def async_get_stats(self) -> list[dict[str, Any]]:
+        """Devuelve contadores por cliente, incluidas las peticiones agrupadas."""
+        stats = []
+        for (base_url, _token), shared in self._clients.items():
+            metrics = shared.client.get_metrics()
+            stats.append(
+                {
+                    "base_url": base_url,
+                    "users": shared.refs,
+                    "total_requests": metrics["total_requests"],
+                    "coalesced_requests": metrics["coalesced_requests"],
+                    "circuit_state": metrics["circuit"]["state"],
+                    "budget": metrics["budget"],
+                }
+            )
+        return stats
+
+
+@callback
+def async_get_registry(hass: HomeAssistant) -> SentinelClientRegistry:
+    """Devuelve el registro de clientes del proceso, creándolo si hace falta."""
+    registry = hass.data.get(DATA_CLIENTS)
+    if registry is None:
+        registry = hass.data[DATA_CLIENTS] = SentinelClientRegistry(hass)
+    return registry
@@ -0,0 +1,100 @@
+"""Planificador adaptativo del intervalo de sondeo según el sol y la variabilidad."""
+from __future__ import annotations
+from collections import deque
+from datetime import date, datetime, timedelta
+from statistics import fmean, pstdev
+from typing import Optional
+import logging
+
+from homeassistant.const import SUN_EVENT_SUNRISE, SUN_EVENT_SUNSET
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.sun import get_astral_event_next, is_up
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+MIN_INTERVAL = timedelta(minutes=5)  # Intervalo más corto en días muy variables
+NIGHT_MAX_INTERVAL = timedelta(hours=6)  # Nunca dormir más de esto aunque falte más para el amanecer
+SUNRISE_MARGIN = timedelta(minutes=10)  # Primer sondeo un poco después del amanecer
+VARIANCE_WINDOW = 6  # Muestras recientes usadas para medir la variabilidad
+FAST_CHANGE_RATIO = 0.35  # Variación relativa a partir de la que se sondea a 1/4 del intervalo
+CHANGE_RATIO = 0.15  # Variación relativa a partir de la que se sondea a la mitad
+
+
+class AdaptivePollScheduler:
+    """Calcula el siguiente ``update_interval`` del coordinador.
+
+    - De noche espera hasta poco después del amanecer (con un máximo).
+    - De día parte del intervalo configurado y lo acorta si la potencia cambia rápido.
+    - Si hay presupuesto diario de peticiones, reparte las que quedan hasta el ocaso.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        base_interval: timedelta,
+        daily_budget: int = 0,
+    ) -> None:
+        self._hass = hass
+        self.base_interval = base_interval
+        self.daily_budget = daily_budget
+        self._power: deque[float] = deque(maxlen=VARIANCE_WINDOW)
+        self._day: Optional[date] = None
+        self._requests_today = 0
+
+    @property
+    def requests_today(self) -> int:
+        return self._requests_today
+
+    def record_requests(self, count: int, now: Optional[datetime] = None) -> None:
+        """Apunta las peticiones HTTP hechas en el día local en curso."""
+        today = dt_util.as_local(now or dt_util.utcnow()).date()
+        if today != self._day:
+            self._day = today
+            self._requests_today = 0
+        self._requests_today += count
+
+    def record_power(self, power_w: float) -> None:
+        self._power.append(power_w)
+
+    def _variability(self) -> float:
+        """Variación relativa entre muestras consecutivas (0 = estable)."""
+        if len(self._power) < 3:
+            return 0.0
+        samples = list(self._power)
+        diffs = [b - a for a, b in zip(samples, samples[1:])]
+        scale = max(fmean(abs(p) for p in samples), 1.0)
+        return pstdev(diffs) / scale
+
+    def next_interval(self, requests_per_poll: int = 1, now: Optional[datetime] = None) -> timedelta:
+        now = now or dt_util.utcnow()
+
+        if not is_up(self._hass, now):
+            sunrise = get_astral_event_next(self._hass, SUN_EVENT_SUNRISE, now)
+            wait = min(sunrise + SUNRISE_MARGIN - now, NIGHT_MAX_INTERVAL)
+            return max(wait, MIN_INTERVAL)
+
+        interval = self.base_interval
+        variability = self._variability()
+        if variability >= FAST_CHANGE_RATIO:
+            interval = interval / 4
+        elif variability >= CHANGE_RATIO:
+            interval = interval / 2
+        interval = max(interval, min(MIN_INTERVAL, self.base_interval))
+
+        if self.daily_budget > 0:
+            interval = max(interval, self._budget_interval(requests_per_poll, now))
+        return interval
+
+    def _budget_interval(self, requests_per_poll: int, now: datetime) -> timedelta:
+        """Intervalo mínimo para no superar el presupuesto diario hasta el ocaso."""
+        if self._day != dt_util.as_local(now).date():
+            self.record_requests(0, now)
+        remaining_polls = (self.daily_budget - self._requests_today) // max(requests_per_poll, 1)
+        sunset = get_astral_event_next(self._hass, SUN_EVENT_SUNSET, now)
+        if remaining_polls <= 0:
+            # Presupuesto agotado: no volver a sondear hasta el día siguiente
+            midnight = dt_util.start_of_local_day(dt_util.as_local(now) + timedelta(days=1))
+            _LOGGER.debug("Presupuesto diario de %d peticiones agotado", self.daily_budget)
+            return max(midnight - now, MIN_INTERVAL)
+        return (sunset - now) / remaining_polls
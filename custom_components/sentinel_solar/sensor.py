@@ -1,94 +1,286 @@
 from __future__ import annotations
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import (
+    async_call_later, async_track_point_in_utc_time, async_track_time_interval,
+)
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoreEntity, RestoredExtraData
 from homeassistant.util import dt as dt_util
 
+from .circuit import CIRCUIT_STATES
+from .backfill import async_fetch_gap_samples, async_import_backfill_statistics, split_hourly
 from .const import (
-    DOMAIN, CONF_SHARE_FACTOR, DEFAULT_SHARE_FACTOR, 
-    CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES,
-    DEFAULT_BASE_URL
+    DOMAIN,
+    CONF_INTEGRATION_METHOD, DEFAULT_INTEGRATION_METHOD,
+    CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND,
+    CONF_ENERGY_DEADBAND, DEFAULT_ENERGY_DEADBAND,
+    CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL,
+    CONF_NOWCAST, DEFAULT_NOWCAST, NOWCAST_INTERVAL_SECONDS,
 )
+from .integration import EnergyIntegrator
+from .ledger import EnergyLedger, async_get_energy_ledger
+from .meters import PERIOD_DAY, PERIOD_MONTH, PERIODS, PeriodMeters
+from .metrics import PHASE_TOTAL
+from .nowcast import Nowcaster
+
+_LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Configurar los sensores de la integración."""
     data = hass.data[DOMAIN][entry.entry_id]
     coordinator = data["coordinator"]
+    device_info = data["device_info"]
+
+    # Sensores de potencia (W) y energía (kWh) por cada asset de la entrada, y la
+    # energía de la hora, el día, la semana y el mes que lleva el propio sensor de energía
+    entities = []
+    for asset_id in coordinator.asset_ids:
+        meters = PeriodMeters(dt_util.DEFAULT_TIME_ZONE)
+        entities.append(SentinelPowerSensor(coordinator, entry, asset_id, device_info))
+        entities.append(SentinelEnergySensor(coordinator, entry, asset_id, device_info, meters))
+        entities.extend(
+            SentinelPeriodEnergySensor(coordinator, entry, asset_id, device_info, meters, period)
+            for period in PERIODS
+        )
 
-    # Sensores de potencia (W) y energía (kWh)
-    power_sensor = SentinelPowerSensor(coordinator, entry)
-    energy_sensor = SentinelEnergySensor(coordinator, entry)
+    # Diagnóstico de latencia de la API (desactivado por defecto) y estado del circuito
+    entities.append(SentinelLatencySensor(coordinator, entry, device_info))
+    entities.append(SentinelCircuitSensor(coordinator, entry, device_info))
+
+    async_add_entities(entities)
+
+
+def _asset_suffixes(coordinator, asset_id: str) -> tuple[str, str]:
+    """Devuelve los sufijos de unique_id y nombre para un asset.
+
+    El asset principal conserva los identificadores originales para no romper
+    instalaciones existentes; los adicionales se distinguen por su ID.
+    """
+    if asset_id == coordinator.asset_general:
+        return "", ""
+    return f"_{asset_id}", f" {asset_id}"
+
+
+class _WriteThrottle:
+    """Decide si una actualización merece una nueva escritura de estado.
+
+    Se escribe siempre que cambia la disponibilidad o la marca (p. ej. si el
+    valor es estimado o una lectura antigua, o el factor de participación). Si
+    el valor no ha cambiado (sólo lo harían atributos volátiles) no se escribe.
+    Tampoco se escribe si el cambio respecto al último valor escrito es menor que
+    ``deadband``. Si lo que lo impide es ``min_interval``, el cambio queda
+    pendiente y ``defer`` programa la escritura para cuando se cumpla el intervalo.
+    """
+
+    __slots__ = (
+        "deadband", "min_interval", "pending", "_value", "_available", "_marker", "_written_at",
+        "_unsub_deferred",
+    )
+
+    def __init__(self, deadband: float, min_interval: float) -> None:
+        self.deadband = deadband
+        self.min_interval = min_interval
+        self.pending = False  # Hay un cambio sin escribir sólo por ``min_interval``
+        self._value: Optional[float] = None
+        self._available: Optional[bool] = None
+        self._marker: Any = None
+        self._written_at = 0.0
+        self._unsub_deferred: Optional[CALLBACK_TYPE] = None
+
+    def allow(self, value: Optional[float], available: bool, marker: Any = None) -> bool:
+        """Devuelve ``True`` (y lo anota como escrito) si hay que escribir el estado."""
+        now = time.monotonic()
+        if (
+            available == self._available
+            and marker == self._marker
+            and value is not None
+            and self._value is not None
+        ):
+            self.pending = False
+            if value == self._value:
+                return False
+            if abs(value - self._value) < self.deadband:
+                return False
+            if now - self._written_at < self.min_interval:
+                self.pending = True
+                return False
+        self.written(value, available, marker, now)
+        return True
+
+    def written(
+        self, value: Optional[float], available: bool, marker: Any = None, now: Optional[float] = None
+    ) -> None:
+        self.pending = False
+        self._value = value
+        self._available = available
+        self._marker = marker
+        self._written_at = time.monotonic() if now is None else now
+
+    def defer(self, hass: HomeAssistant, action: Callable[[], None]) -> None:
+        """Programa ``action`` al acabar ``min_interval`` si hay un cambio pendiente.
+
+        Sin esto, si la potencia deja de cambiar el último valor omitido no se
+        escribiría nunca.
+        """
+        if not self.pending or self._unsub_deferred is not None:
+            return
 
-    async_add_entities([power_sensor, energy_sensor])
+        @callback
+        def _run(_now: datetime) -> None:
+            self._unsub_deferred = None
+            action()
+
+        delay = max(0.0, self.min_interval - (time.monotonic() - self._written_at))
+        self._unsub_deferred = async_call_later(hass, delay, _run)
+
+    @callback
+    def cancel(self) -> None:
+        if self._unsub_deferred is not None:
+            self._unsub_deferred()
+            self._unsub_deferred = None
 
 
 # ------------------------ Potencia (W) ------------------------
 
 class SentinelPowerSensor(CoordinatorEntity, SensorEntity):
-    """Sensor de potencia instantánea."""
+    """Sensor de potencia instantánea.
+
+    Con la opción de estimación activada, entre dos consultas publica cada
+    ``NOWCAST_INTERVAL_SECONDS`` una potencia estimada con la curva solar del
+    lugar (atributo ``estimated``); la siguiente lectura real la sustituye.
+    """
     _attr_native_unit_of_measurement = "W"
     _attr_device_class = SensorDeviceClass.POWER
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_has_entity_name = True
+    # Cambian en cada lectura: no generar una fila de atributos nueva en el recorder
+    _unrecorded_attributes = frozenset({"api_timestamp", "raw_power", "data_age"})
 
-    def __init__(self, coordinator, entry: ConfigEntry) -> None:
+    def __init__(self, coordinator, entry: ConfigEntry, asset_id: str, device_info: DeviceInfo) -> None:
         super().__init__(coordinator)
         self._entry = entry
-        self._attr_name = "Potencia"
-        self._attr_unique_id = f"{entry.entry_id}_power"
+        self._asset_id = asset_id
+        uid_suffix, name_suffix = _asset_suffixes(coordinator, asset_id)
+        self._attr_name = f"Potencia{name_suffix}"
+        self._attr_unique_id = f"{entry.entry_id}{uid_suffix}_power"
+        self._attr_device_info = device_info
+        self._throttle = _WriteThrottle(
+            float(entry.options.get(CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND)),
+            float(entry.options.get(CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL)),
+        )
+        self._nowcaster: Optional[Nowcaster] = None
+        if entry.options.get(CONF_NOWCAST, DEFAULT_NOWCAST):
+            config = coordinator.hass.config
+            self._nowcaster = Nowcaster(config.latitude, config.longitude)
+        self._estimate: Optional[float] = None  # W con factor; None = se muestra la lectura real
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._throttle.cancel)
+        if self._nowcaster is None:
+            return
+        self._record_measurement()
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, self._handle_nowcast, timedelta(seconds=NOWCAST_INTERVAL_SECONDS)
+            )
+        )
+
+    def _record_measurement(self) -> None:
+        """Pasa la lectura real actual al estimador (los datos servidos de caché no cuentan)."""
+        snapshot = self.coordinator.snapshot(self._asset_id)
+        if snapshot is None or self.coordinator.is_stale(self._asset_id):
+            return
+        measured_at = snapshot.timestamp or dt_util.utcnow()
+        self._nowcaster.record(measured_at.timestamp(), snapshot.raw_power_w)
+
+    @callback
+    def _handle_nowcast(self, now: datetime) -> None:
+        """Publica una estimación si la última lectura real ya no es reciente.
+
+        La antigüedad se mide desde que se obtuvo la lectura (``fetched_at``), no
+        desde su timestamp en la API, que llega con el retraso de publicación.
+        """
+        snapshot = self.coordinator.snapshot(self._asset_id)
+        if snapshot is None or self._nowcaster.last_measurement is None:
+            return
+        if (now - snapshot.fetched_at).total_seconds() < NOWCAST_INTERVAL_SECONDS / 2:
+            return
+        estimate = self._nowcaster.estimate(now.timestamp())
+        if estimate is None:
+            return
+        self._estimate = round(estimate * snapshot.factor, 1)
+        self._write_state()
+
+    def _marker(self) -> tuple[bool, bool, float]:
+        """Si el valor es estimado, si es una lectura antigua y el factor: su cambio siempre se escribe."""
+        return (
+            self._estimate is not None,
+            self.coordinator.is_stale(self._asset_id),
+            self.coordinator.share_factor,
+        )
+
+    @callback
+    def _write_state(self) -> None:
+        if self._throttle.allow(self.native_value, self.available, self._marker()):
+            self.async_write_ha_state()
+        else:
+            self._throttle.defer(self.hass, self._write_state)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Escribe el estado sólo si la potencia ha cambiado lo suficiente."""
+        if self._nowcaster is not None:
+            self._record_measurement()
+            self._estimate = None
+        self._write_state()
 
     @property
-    def _node(self) -> dict:
-        return (self.coordinator.data or {}).get("general") or {}
+    def available(self) -> bool:
+        """El asset deja de estar disponible si falló en la última consulta."""
+        return super().available and self.coordinator.snapshot(self._asset_id) is not None
 
     @property
     def api_timestamp(self) -> Optional[str]:
-        return self._node.get("timestamp")
-
-    def _get_power_w(self) -> float:
-        """Obtiene la potencia en vatios."""
-        raw_power = float(self._node.get("power", 0.0))
-        # Aplicar factor de participación
-        factor = float(self._entry.options.get(CONF_SHARE_FACTOR, DEFAULT_SHARE_FACTOR))
-        return round(raw_power * factor, 1)
-    
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information."""
-        data = self.hass.data[DOMAIN][self._entry.entry_id]
-        asset_info = data.get("asset_info", {})
-        asset_name = asset_info.get("name") or asset_info.get("assetName") or data.get("asset_general", "sentinel_solar")
-        
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            name=asset_name,
-            manufacturer="sentinel_solar (proyecto no oficial de Sentinel Solar)",
-            model=asset_info.get("type") or asset_info.get("assetType") or "Asset",
-            sw_version=asset_info.get("firmwareVersion") or asset_info.get("firmware_version"),
-            configuration_url=f"{self._entry.data.get('base_url', DEFAULT_BASE_URL)}",
-        )
+        snapshot = self.coordinator.snapshot(self._asset_id)
+        return snapshot.raw_timestamp if snapshot else None
 
     @property
     def native_value(self) -> Optional[float]:
-        return self._get_power_w()
+        """Potencia en vatios con el factor de participación ya aplicado."""
+        if self._estimate is not None:
+            return self._estimate
+        snapshot = self.coordinator.snapshot(self._asset_id)
+        return snapshot.power_w if snapshot else None
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
-        factor = float(self._entry.options.get(CONF_SHARE_FACTOR, DEFAULT_SHARE_FACTOR))
-        raw_power = float(self._node.get("power", 0.0))
-        return {
-            "api_timestamp": self.api_timestamp,
+        snapshot = self.coordinator.snapshot(self._asset_id)
+        attributes = {
+            "asset_id": self._asset_id,
+            "api_timestamp": snapshot.raw_timestamp if snapshot else None,
             "source": "power-data/instant",
-            "share_factor": factor,
-            "raw_power": raw_power,
+            "share_factor": self.coordinator.share_factor,
+            "raw_power": snapshot.raw_power_w if snapshot else 0.0,
+            # Segundos desde que se obtuvo la lectura; ``stale`` si la última consulta falló
+            "data_age": round((dt_util.utcnow() - snapshot.fetched_at).total_seconds()) if snapshot else None,
+            "stale": self.coordinator.is_stale(self._asset_id),
         }
+        if self._nowcaster is not None:
+            # Se registra en el historial para distinguir valores estimados de medidos
+            attributes["estimated"] = self._estimate is not None
+        return attributes
 
 
 # ------------------------ Energía acumulada (kWh) ------------------------
@@ -99,82 +291,225 @@ class SentinelEnergySensor(CoordinatorEntity, RestoreEntity, SensorEntity):
     _attr_device_class = SensorDeviceClass.ENERGY
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
     _attr_has_entity_name = True
-
-    def __init__(self, coordinator, entry: ConfigEntry) -> None:
+    _unrecorded_attributes = frozenset({"api_timestamp"})
+
+    def __init__(
+        self,
+        coordinator,
+        entry: ConfigEntry,
+        asset_id: str,
+        device_info: DeviceInfo,
+        meters: PeriodMeters,
+    ) -> None:
         super().__init__(coordinator)
         self._entry = entry
-        self._attr_name = "Energía"
-        self._attr_unique_id = f"{entry.entry_id}_energy"
+        self._asset_id = asset_id
+        uid_suffix, name_suffix = _asset_suffixes(coordinator, asset_id)
+        self._attr_name = f"Energía{name_suffix}"
+        self._attr_unique_id = f"{entry.entry_id}{uid_suffix}_energy"
+        self._attr_device_info = device_info
         self._energy_kwh: Optional[float] = None
-        self._last_api_ts: Optional[str] = None
+        self._last_api_ts: Optional[datetime] = None  # UTC
         self._last_ha_utc: Optional[datetime] = None  # fallback si no hay ts API
-
-        self._update_minutes = int(self._entry.options.get(CONF_UPDATE_MINUTES, DEFAULT_UPDATE_MINUTES))
-        self._max_delta = timedelta(
-            minutes=max(5, min(self._update_minutes * 3, 6 * 60))
+        self._backfill_task: Optional[asyncio.Task] = None
+        self._meters = meters
+        self._unsub_meter_reset = None
+        self._ledger: Optional[EnergyLedger] = None
+        self._integrator = EnergyIntegrator(
+            self._entry.options.get(CONF_INTEGRATION_METHOD, DEFAULT_INTEGRATION_METHOD)
         )
-    
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information."""
-        data = self.hass.data[DOMAIN][self._entry.entry_id]
-        asset_info = data.get("asset_info", {})
-        asset_name = asset_info.get("name") or asset_info.get("assetName") or data.get("asset_general", "sentinel_solar")
-        
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            name=asset_name,
-            manufacturer="sentinel_solar (proyecto no oficial de Sentinel Solar)",
-            model=asset_info.get("type") or asset_info.get("assetType") or "Asset",
-            sw_version=asset_info.get("firmwareVersion") or asset_info.get("firmware_version"),
-            configuration_url=f"{self._entry.data.get('base_url', DEFAULT_BASE_URL)}",
+        self._throttle = _WriteThrottle(
+            float(entry.options.get(CONF_ENERGY_DEADBAND, DEFAULT_ENERGY_DEADBAND)),
+            float(entry.options.get(CONF_MIN_WRITE_INTERVAL, DEFAULT_MIN_WRITE_INTERVAL)),
         )
 
+    @property
+    def _factor(self) -> float:
+        # Se lee del coordinador: puede cambiar sin recargar la entrada
+        return self.coordinator.share_factor
+
+    @property
+    def _max_delta(self) -> timedelta:
+        return timedelta(minutes=max(5, min(self.coordinator.update_minutes * 3, 6 * 60)))
+
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
-        factor = float(self._entry.options.get(CONF_SHARE_FACTOR, DEFAULT_SHARE_FACTOR))
         return {
-            "api_timestamp": self._last_api_ts,
+            "asset_id": self._asset_id,
+            "api_timestamp": self._last_api_ts.isoformat() if self._last_api_ts else None,
             "source": "power-data/instant",
-            "integration": "rectangular_api_ts",
-            "share_factor": factor,
+            "integration": self._integrator.method,
+            "share_factor": self._factor,
         }
 
-    def _get_power_w(self) -> float:
-        """Obtiene la potencia en vatios aplicando el factor de participación."""
-        node = (self.coordinator.data or {}).get("general") or {}
-        raw_power = float(node.get("power", 0.0))
-        factor = float(self._entry.options.get(CONF_SHARE_FACTOR, DEFAULT_SHARE_FACTOR))
-        return raw_power * factor
-
-    def _get_api_ts_str(self) -> Optional[str]:
-        """Obtiene el timestamp de la API desde los datos del coordinador."""
-        node = (self.coordinator.data or {}).get("general") or {}
-        return node.get("timestamp")
-
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
+        self.async_on_remove(self._throttle.cancel)
+        self._ledger = await async_get_energy_ledger(self.hass)
         last_state = await self.async_get_last_state()
-        if last_state and last_state.state not in (None, "", "unknown", "unavailable"):
-            try:
-                self._energy_kwh = float(last_state.state)
-            except (TypeError, ValueError):
-                self._energy_kwh = 0.0
-            self._last_api_ts = last_state.attributes.get("api_timestamp")
+        extra = await self.async_get_last_extra_data()
+
+        # El registro se guarda con más frecuencia que el estado restaurable: si es
+        # igual de reciente o más, se usa él (recuperación exacta tras un corte)
+        record = self._ledger.get(self.unique_id)
+        if record is not None and (
+            last_state is None or record.get("updated_at", 0) >= last_state.last_updated.timestamp()
+        ):
+            self._restore(
+                record.get("total_kwh"),
+                record.get("last_api_ts"),
+                record.get("samples"),
+                record.get("meters"),
+            )
         else:
-            self._energy_kwh = 0.0
+            restored = extra.as_dict() if extra is not None else {}
+            total = None
+            api_ts = None
+            if last_state and last_state.state not in (None, "", "unknown", "unavailable"):
+                total = last_state.state
+                api_ts = last_state.attributes.get("api_timestamp")
+            self._restore(total, api_ts, restored.get("samples"), restored.get("meters"))
         self._last_ha_utc = dt_util.utcnow()
+        self._meters.notify()
+        self._schedule_meter_reset()
+
+    def _restore(
+        self,
+        total: Any,
+        api_ts: Optional[str],
+        samples: Optional[list],
+        meters: Optional[dict],
+    ) -> None:
+        """Recupera el total, el último timestamp, el integrador y los contadores."""
+        try:
+            self._energy_kwh = float(total) if total is not None else 0.0
+        except (TypeError, ValueError):
+            self._energy_kwh = 0.0
+        if api_ts:
+            parsed = dt_util.parse_datetime(api_ts)
+            self._last_api_ts = dt_util.as_utc(parsed) if parsed else None
+        # Muestras recientes del integrador (necesarias para trapecio/Simpson tras reiniciar)
+        try:
+            self._integrator.ring.extend(samples or [])
+        except (TypeError, ValueError):
+            self._integrator.ring.clear()
+        self._meters.restore(meters)
+
+    @callback
+    def _checkpoint(self) -> None:
+        """Anota el estado de integración en el registro persistente (escritura agrupada)."""
+        if self._ledger is None:
+            return
+        self._ledger.async_update(
+            self.unique_id,
+            {
+                "total_kwh": self._energy_kwh,
+                "last_api_ts": self._last_api_ts.isoformat() if self._last_api_ts else None,
+                "samples": self._integrator.ring.to_list(),
+                "meters": self._meters.as_dict(),
+            },
+        )
+
+    @property
+    def extra_restore_state_data(self) -> ExtraStoredData:
+        return RestoredExtraData(
+            {"samples": self._integrator.ring.to_list(), "meters": self._meters.as_dict()}
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+        if self._unsub_meter_reset is not None:
+            self._unsub_meter_reset()
+            self._unsub_meter_reset = None
+        await super().async_will_remove_from_hass()
+
+    def _schedule_meter_reset(self) -> None:
+        """Programa el reinicio de los contadores al final del periodo en curso."""
+        self._unsub_meter_reset = async_track_point_in_utc_time(
+            self.hass, self._handle_meter_reset, self._meters.next_reset()
+        )
+
+    @callback
+    def _handle_meter_reset(self, now: datetime) -> None:
+        self._unsub_meter_reset = None
+        if self._meters.roll(now.timestamp()):
+            self._meters.notify()
+        self._schedule_meter_reset()
 
     @property
     def native_value(self) -> Optional[float]:
         return round(self._energy_kwh or 0.0, 6)
 
-    def _integrate(self, power_w: float, dt_seconds: float) -> None:
-        """Integra potencia (W) durante un tiempo (segundos) para obtener energía (kWh)."""
-        if dt_seconds <= 0:
-            return
-        dt_h = dt_seconds / 3600.0
-        self._energy_kwh = (self._energy_kwh or 0.0) + (power_w / 1000.0) * dt_h
+    async def _async_backfill(self, start: datetime, end: datetime, raw_power_w: float) -> None:
+        """Rellena un hueco largo con el histórico de la API en lugar de recortarlo.
+
+        La serie se integra de una vez por trapecios, se suma al total y las horas
+        completas se escriben en las estadísticas a largo plazo. Si no hay
+        histórico disponible se recurre a la estimación acotada de siempre. El
+        último timestamp de la API sólo avanza hasta ``end`` cuando el relleno se ha
+        aplicado: si se cancela, el punto de control guardado sigue en ``start``.
+        """
+        try:
+            samples = await async_fetch_gap_samples(
+                self.coordinator.client, self._asset_id, start, end, raw_power_w
+            )
+        except Exception as err:
+            _LOGGER.warning("No se pudo obtener el histórico para rellenar %s → %s: %s", start, end, err)
+            samples = []
+
+        try:
+            if len(samples) >= 2:
+                total_before = self._energy_kwh or 0.0
+                hourly = split_hourly(samples, self._factor)
+                added_kwh = sum(kwh for _hour, kwh in hourly)
+                imported = await async_import_backfill_statistics(
+                    self.hass, self.entity_id, hourly, total_before
+                )
+                _LOGGER.info(
+                    "Hueco %s → %s rellenado con %d muestras: %.3f kWh (%d horas en estadísticas)",
+                    start, end, len(samples), added_kwh, imported,
+                )
+                self._energy_kwh = (self._energy_kwh or 0.0) + added_kwh
+                for hour, kwh in hourly:
+                    # A mitad de cada hora para que caiga dentro de su periodo
+                    self._meters.add(kwh, hour + 1800)
+                # El integrador continúa desde la última muestra del hueco, salvo
+                # que ya tenga muestras posteriores
+                last = self._integrator.ring.last()
+                if not last or last[0][0] <= end.timestamp():
+                    self._integrator.ring.clear()
+                    self._integrator.ring.append(end.timestamp(), raw_power_w)
+            else:
+                self._integrate(
+                    end.timestamp(), raw_power_w, start.timestamp(), self._max_delta.total_seconds()
+                )
+            if self._last_api_ts is None or self._last_api_ts < end:
+                self._last_api_ts = end
+            self._checkpoint()
+            self._throttle.written(self.native_value, self.available, self._factor)
+            self.async_write_ha_state()
+            self._meters.notify()
+        finally:
+            self._backfill_task = None
+
+        # Lecturas llegadas durante el relleno: integrarlas desde el final del hueco
+        snapshot = self.coordinator.snapshot(self._asset_id)
+        if snapshot is not None and snapshot.timestamp is not None and snapshot.timestamp > end:
+            self._handle_coordinator_update()
+
+    def _integrate(
+        self,
+        ts: float,
+        raw_power_w: float,
+        prev_ts: Optional[float],
+        max_dt: Optional[float] = None,
+    ) -> None:
+        """Añade la energía (kWh) del tramo que termina en ``ts`` con el método configurado."""
+        energy_kwh = self._integrator.add(ts, raw_power_w, prev_ts, max_dt) * self._factor
+        if energy_kwh:
+            self._energy_kwh = (self._energy_kwh or 0.0) + energy_kwh
+            self._meters.add(energy_kwh, ts)
 
     def _bounded_delta(self, start: datetime, end: datetime) -> float:
         """Calcula el delta de tiempo limitado entre dos fechas."""
@@ -185,43 +520,50 @@ class SentinelEnergySensor(CoordinatorEntity, RestoreEntity, SensorEntity):
             delta = self._max_delta
         return delta.total_seconds()
 
-    def _parse_ts(self, ts: str) -> Optional[datetime]:
-        """Parsea un timestamp string a datetime UTC."""
-        dt = dt_util.parse_datetime(ts)
-        if dt is not None:
-            return dt_util.as_utc(dt)
-        return None
-
     def _on_coordinator_update(self) -> None:
-        api_ts = self._get_api_ts_str()
-        power_w = self._get_power_w()
+        snapshot = self.coordinator.snapshot(self._asset_id)
+        if snapshot is None or self.coordinator.is_stale(self._asset_id):
+            # El asset falló: no integrar con datos ausentes o repetidos
+            return
+        new_dt = snapshot.timestamp
+        raw_power_w = snapshot.raw_power_w
         now_utc = dt_util.utcnow()
 
-        if api_ts:
-            if api_ts == self._last_api_ts:
+        if new_dt is not None:
+            if self._backfill_task is not None:
+                # Hay un relleno en curso: las lecturas nuevas se integran al terminar
+                return
+            if new_dt == self._last_api_ts:
                 return
-            new_dt = self._parse_ts(api_ts)
-            last_dt = self._parse_ts(self._last_api_ts) if self._last_api_ts else None
+            last_dt = self._last_api_ts
 
             if last_dt is None:
-                self._last_api_ts = api_ts
+                self._last_api_ts = new_dt
                 return
 
-            dt_sec = self._bounded_delta(last_dt, new_dt)
-            if dt_sec > 0:
-                self._integrate(power_w, dt_sec)
-                self._last_api_ts = api_ts
+            if new_dt - last_dt > self._max_delta:
+                # Hueco largo (reinicio, corte de red...): rellenar con el histórico
+                self._backfill_task = self.hass.async_create_task(
+                    self._async_backfill(last_dt, new_dt, raw_power_w)
+                )
+                return
+
+            if self._bounded_delta(last_dt, new_dt) > 0:
+                self._integrate(new_dt.timestamp(), raw_power_w, last_dt.timestamp())
+                self._last_api_ts = new_dt
         else:
             if self._last_ha_utc is None:
                 self._last_ha_utc = now_utc
                 return
-            dt_sec = self._bounded_delta(self._last_ha_utc, now_utc)
-            if dt_sec > 0:
-                self._integrate(power_w, dt_sec)
+            if self._bounded_delta(self._last_ha_utc, now_utc) > 0:
+                self._integrate(
+                    now_utc.timestamp(),
+                    raw_power_w,
+                    self._last_ha_utc.timestamp(),
+                    self._max_delta.total_seconds(),
+                )
                 self._last_ha_utc = now_utc
 
-        self.async_write_ha_state()
-
     async def async_update(self) -> None:
         return
 
@@ -229,7 +571,146 @@ class SentinelEnergySensor(CoordinatorEntity, RestoreEntity, SensorEntity):
     def should_poll(self) -> bool:
         return False
 
+    @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle coordinator update."""
-        super()._handle_coordinator_update()
+        """Integra la nueva lectura y escribe el estado una sola vez si merece la pena."""
         self._on_coordinator_update()
+        self._checkpoint()
+        self._write_state()
+
+    @callback
+    def _write_state(self) -> None:
+        # El factor es un atributo: si cambia se escribe aunque la energía no lo haga
+        if self._throttle.allow(self.native_value, self.available, self._factor):
+            self.async_write_ha_state()
+            self._meters.notify()
+        else:
+            self._throttle.defer(self.hass, self._write_state)
+
+
+# ------------------------ Energía por periodo (kWh) ------------------------
+
+class SentinelPeriodEnergySensor(CoordinatorEntity, SensorEntity):
+    """Energía del periodo en curso, calculada por el sensor de energía del asset.
+
+    No escucha cambios de estado: el sensor de energía le avisa cuando escribe
+    o cuando empieza un periodo nuevo.
+    """
+    _attr_native_unit_of_measurement = "kWh"
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator,
+        entry: ConfigEntry,
+        asset_id: str,
+        device_info: DeviceInfo,
+        meters: PeriodMeters,
+        period: str,
+    ) -> None:
+        super().__init__(coordinator)
+        self._meters = meters
+        self._period = period
+        uid_suffix, name_suffix = _asset_suffixes(coordinator, asset_id)
+        # Nombre traducido (``energy_<periodo>``); los assets adicionales añaden su ID
+        self._attr_translation_key = f"energy_{period}"
+        self._attr_translation_placeholders = {"asset_suffix": name_suffix}
+        self._attr_unique_id = f"{entry.entry_id}{uid_suffix}_energy_{period}"
+        self._attr_device_info = device_info
+        # Hoy y este mes, activos; hora y semana se pueden activar si hacen falta
+        self._attr_entity_registry_enabled_default = period in (PERIOD_DAY, PERIOD_MONTH)
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._meters.add_listener(self.async_write_ha_state))
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """El valor sólo cambia cuando avisa el sensor de energía."""
+
+    @property
+    def native_value(self) -> float:
+        return round(self._meters.value(self._period), 6)
+
+    @property
+    def last_reset(self) -> datetime:
+        return self._meters.start(self._period)
+
+
+# ------------------------ Diagnóstico: latencia de la API ------------------------
+
+class SentinelLatencySensor(CoordinatorEntity, SensorEntity):
+    """Percentil 95 de la latencia total de ``power-data/instant`` (ms)."""
+    _attr_native_unit_of_measurement = "ms"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_has_entity_name = True
+    _attr_translation_key = "api_latency_p95"
+    _attr_icon = "mdi:timer-sand"
+    _unrecorded_attributes = frozenset({"p50_ms", "p99_ms", "requests"})
+
+    _ENDPOINT = "/api/asset/{id}/power-data/instant"
+
+    def __init__(self, coordinator, entry: ConfigEntry, device_info: DeviceInfo) -> None:
+        super().__init__(coordinator)
+        self._entry = entry
+        # Sin ``_attr_name``: el nombre sale de la traducción ``api_latency_p95``
+        self._attr_unique_id = f"{entry.entry_id}_api_latency_p95"
+        self._attr_device_info = device_info
+
+    def _summary(self) -> dict[str, Any]:
+        histogram = self.coordinator.client.timings.get(self._ENDPOINT, PHASE_TOTAL)
+        return histogram.summary() if histogram else {}
+
+    @property
+    def native_value(self) -> Optional[float]:
+        return self._summary().get("p95_ms")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        summary = self._summary()
+        return {
+            "p50_ms": summary.get("p50_ms"),
+            "p99_ms": summary.get("p99_ms"),
+            "requests": summary.get("count", 0),
+        }
+
+
+# ------------------------ Diagnóstico: circuito de la API ------------------------
+
+class SentinelCircuitSensor(CoordinatorEntity, SensorEntity):
+    """Estado del circuit breaker de la API: ``closed``, ``open`` o ``half_open``."""
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = CIRCUIT_STATES
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_has_entity_name = True
+    _attr_translation_key = "api_circuit"
+    _attr_icon = "mdi:api"
+    _unrecorded_attributes = frozenset(
+        {"consecutive_failures", "next_probe", "opened_total", "rejected_requests", "last_error"}
+    )
+
+    def __init__(self, coordinator, entry: ConfigEntry, device_info: DeviceInfo) -> None:
+        super().__init__(coordinator)
+        self._entry = entry
+        # Sin ``_attr_name``: el nombre sale de la traducción ``api_circuit``
+        self._attr_unique_id = f"{entry.entry_id}_api_circuit"
+        self._attr_device_info = device_info
+
+    @property
+    def available(self) -> bool:
+        """Siempre disponible: precisamente informa de cuándo la API no lo está."""
+        return True
+
+    @property
+    def native_value(self) -> str:
+        return self.coordinator.client.breaker.state
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        circuit = self.coordinator.client.breaker.as_dict()
+        circuit.pop("state")
+        return circuit
@@ -0,0 +1,42 @@
+from __future__ import annotations
+from typing import Any, Callable, Optional
+import time
+
+from homeassistant.helpers.storage import Store
+
+MAX_SAVE_DELAY = 120  # Pase lo que pase, lo pendiente se escribe antes de este tiempo (s)
+
+
+class DebouncedSave:
+    """Escritura agrupada de un ``Store`` con una espera total acotada.
+
+    ``Store.async_delay_save`` pospone la escritura con cada llamada, así que con
+    cambios frecuentes (cada sondeo, cada sensor) no llegaría a escribirse nunca.
+    Aquí cada cambio espera ``delay`` segundos, pero nunca más de ``max_delay``
+    desde el primer cambio pendiente.
+    """
+
+    def __init__(
+        self,
+        store: Store,
+        data_func: Callable[[], Any],
+        delay: float,
+        max_delay: float = MAX_SAVE_DELAY,
+    ) -> None:
+        self._store = store
+        self._data_func = data_func
+        self._delay = delay
+        self._max_delay = max_delay
+        self._pending_since: Optional[float] = None
+
+    def schedule(self) -> None:
+        """Programa la escritura de los cambios pendientes."""
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        delay = max(0.0, min(self._delay, self._pending_since + self._max_delay - now))
+        self._store.async_delay_save(self._data_to_save, delay)
+
+    def _data_to_save(self) -> Any:
+        self._pending_since = None
+        return self._data_func()
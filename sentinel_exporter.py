@@ -0,0 +1,28 @@
+"""Lanza el exportador de Sentinel Solar sin Home Assistant.
+
+Carga ``custom_components/sentinel_solar/exporter.py`` sin ejecutar el
+``__init__`` del paquete (que importa Home Assistant): registra un paquete
+vacío que apunta al directorio de la integración. Sólo hace falta ``aiohttp``:
+
+    python sentinel_exporter.py --token TOKEN --asset 12345 --listen 0.0.0.0:9464
+"""
+from pathlib import Path
+import importlib
+import sys
+import types
+
+COMPONENT_DIR = Path(__file__).resolve().parent / "custom_components" / "sentinel_solar"
+PACKAGE = "sentinel_solar"
+
+
+def load_exporter() -> types.ModuleType:
+    """Importa ``sentinel_solar.exporter`` desde el código del repositorio."""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(COMPONENT_DIR)]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.exporter")
+
+
+if __name__ == "__main__":
+    sys.exit(load_exporter().run())
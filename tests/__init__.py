@@ -0,0 +1 @@
+"""Tests de la integración sentinel_solar."""
@@ -0,0 +1,26 @@
+"""Fixtures comunes de los tests."""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from custom_components.sentinel_solar.api import PowerSample
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Permite cargar ``custom_components/sentinel_solar`` en todos los tests."""
+    yield
+
+
+@pytest.fixture
+def mock_api():
+    """Sustituye las llamadas a la API de Sentinel por respuestas fijas."""
+    sample = PowerSample(power=1000.0, timestamp=None, raw_timestamp=None, source="powerProduction")
+    with patch(
+        "custom_components.sentinel_solar.api.SentinelClient.fetch_power_instant",
+        AsyncMock(return_value=sample),
+    ) as instant, patch(
+        "custom_components.sentinel_solar.api.SentinelClient.fetch_asset_info",
+        AsyncMock(return_value={"name": "Planta"}),
+    ):
+        yield instant
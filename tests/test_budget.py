@@ -0,0 +1,38 @@
+"""Tests del presupuesto de peticiones por token."""
+from custom_components.sentinel_solar.budget import THROTTLE_MEMORY, RateBudget
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_throttle_slows_down_without_headers():
+    clock = FakeClock()
+    budget = RateBudget("test", clock=clock)
+    assert budget.slowdown() == 1.0
+
+    budget.exhausted()
+    budget.exhausted()
+    assert budget.slowdown() == 4.0
+    assert budget.wait_time() > 0
+
+    clock.now += THROTTLE_MEMORY + 1
+    assert budget.slowdown() == 1.0
+
+
+def test_consumers_get_their_own_slot():
+    clock = FakeClock()
+    clock.now = 1000.0
+    budget = RateBudget("test", clock=clock)
+    budget.register("a", 1, 3600)
+    assert budget.next_slot("a", 3600) is None
+
+    budget.register("b", 1, 3600)
+    budget.register("c", 1, 3600)
+    turns = [clock.now + budget.next_slot(key, 3600) for key in "abc"]
+    assert all(turn >= clock.now + 3600 for turn in turns)
+    assert sorted(turn % 3600 for turn in turns) == [0.0, 1200.0, 2400.0]
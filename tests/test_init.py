@@ -0,0 +1,37 @@
+"""Tests de la configuración y las opciones de la entrada."""
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.sentinel_solar.const import (
+    CONF_ASSET_GENERAL, CONF_BASE_URL, CONF_SHARE_FACTOR, CONF_TOKEN, DOMAIN,
+)
+
+
+async def test_share_factor_change_is_applied_without_reload(hass, mock_api):
+    """Cambiar sólo el factor en Opciones no recrea el coordinador ni consulta la API."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Planta",
+        data={CONF_TOKEN: "token", CONF_ASSET_GENERAL: "1234", CONF_BASE_URL: "http://sentinel.test"},
+        options={CONF_SHARE_FACTOR: 1.0},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    calls = mock_api.await_count
+
+    # El flujo de opciones guarda todas las claves, rellenando las que faltaban
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={CONF_SHARE_FACTOR: "0,5"}
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == "create_entry"
+    assert hass.data[DOMAIN][entry.entry_id]["coordinator"] is coordinator
+    assert coordinator.share_factor == 0.5
+    assert coordinator.snapshot("1234").power_w == 500.0
+    assert mock_api.await_count == calls
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,131 @@
+"""Tests de los sensores de la integración."""
+from datetime import timedelta
+from unittest.mock import patch
+import asyncio
+
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.sentinel_solar.api import PowerSample
+from custom_components.sentinel_solar.const import (
+    CONF_ASSET_GENERAL, CONF_ASSETS, CONF_BASE_URL, CONF_NOWCAST, CONF_SHARE_FACTOR, CONF_TOKEN,
+    CONF_UPDATE_MINUTES, DOMAIN,
+)
+from custom_components.sentinel_solar.ledger import async_get_energy_ledger
+
+
+async def test_period_and_latency_names_are_translated(hass, mock_api):
+    """Los sensores por periodo y de latencia toman el nombre de las traducciones."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Planta",
+        data={CONF_TOKEN: "token", CONF_ASSET_GENERAL: "1234", CONF_BASE_URL: "http://sentinel.test"},
+        options={CONF_ASSETS: "5678"},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    registry = er.async_get(hass)
+    names = {
+        reg.unique_id: reg.original_name
+        for reg in er.async_entries_for_config_entry(registry, entry.entry_id)
+    }
+    assert names[f"{entry.entry_id}_energy_day"] == "Energy today"
+    assert names[f"{entry.entry_id}_5678_energy_month"] == "Energy this month 5678"
+    assert names[f"{entry.entry_id}_api_latency_p95"] == "API latency p95"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_backfill_advances_checkpoint_only_when_applied(hass, mock_api):
+    """El punto de control no salta el hueco hasta que el relleno se ha aplicado."""
+    now = dt_util.utcnow().replace(microsecond=0)
+    start, end = now - timedelta(minutes=20), now - timedelta(minutes=2)
+    mock_api.return_value = PowerSample(
+        power=1000.0, timestamp=start, raw_timestamp=start.isoformat(), source="powerProduction"
+    )
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Planta",
+        data={CONF_TOKEN: "token", CONF_ASSET_GENERAL: "1234", CONF_BASE_URL: "http://sentinel.test"},
+        options={CONF_SHARE_FACTOR: 1.0, CONF_UPDATE_MINUTES: 1},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    entity_id = er.async_get(hass).async_get_entity_id("sensor", DOMAIN, f"{entry.entry_id}_energy")
+    sensor = hass.data["entity_components"]["sensor"].get_entity(entity_id)
+    ledger = await async_get_energy_ledger(hass)
+
+    await coordinator.async_refresh()
+    assert ledger.get(sensor.unique_id)["last_api_ts"] == start.isoformat()
+
+    release = asyncio.Event()
+
+    async def fetch_gap(client, asset_id, gap_start, gap_end, end_power_w=None):
+        await release.wait()
+        return [(gap_start.timestamp(), 1000.0), (gap_end.timestamp(), 1000.0)]
+
+    with patch(
+        "custom_components.sentinel_solar.sensor.async_fetch_gap_samples", side_effect=fetch_gap
+    ), patch(
+        "custom_components.sentinel_solar.sensor.async_import_backfill_statistics", return_value=0
+    ):
+        mock_api.return_value = PowerSample(
+            power=1000.0, timestamp=end, raw_timestamp=end.isoformat(), source="powerProduction"
+        )
+        await coordinator.async_refresh()
+        await asyncio.sleep(0)
+        assert ledger.get(sensor.unique_id)["last_api_ts"] == start.isoformat()
+
+        # Lectura posterior mientras se espera al histórico
+        mock_api.return_value = PowerSample(
+            power=1200.0, timestamp=now, raw_timestamp=now.isoformat(), source="powerProduction"
+        )
+        await coordinator.async_refresh()
+        release.set()
+        await hass.async_block_till_done()
+
+    record = ledger.get(sensor.unique_id)
+    assert record["last_api_ts"] == now.isoformat()
+    assert record["samples"][-1] == [now.timestamp(), 1200.0]
+    # 18 min a 1 kW del hueco + 2 min a 1,2 kW de la lectura posterior
+    assert sensor.native_value == pytest.approx(0.3 + 0.04)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_nowcast_waits_for_fetch_age_not_api_age(hass, mock_api):
+    """Una lectura recién obtenida no se sustituye por una estimación aunque su timestamp sea antiguo."""
+    measured = dt_util.utcnow().replace(microsecond=0) - timedelta(minutes=10)
+    mock_api.return_value = PowerSample(
+        power=1000.0, timestamp=measured, raw_timestamp=measured.isoformat(), source="powerProduction"
+    )
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Planta",
+        data={CONF_TOKEN: "token", CONF_ASSET_GENERAL: "1234", CONF_BASE_URL: "http://sentinel.test"},
+        options={CONF_NOWCAST: True},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    entity_id = er.async_get(hass).async_get_entity_id("sensor", DOMAIN, f"{entry.entry_id}_power")
+    sensor = hass.data["entity_components"]["sensor"].get_entity(entity_id)
+    fetched_at = coordinator.snapshot("1234").fetched_at
+
+    sensor._handle_nowcast(fetched_at + timedelta(minutes=1))
+    assert sensor._estimate is None
+
+    sensor._handle_nowcast(fetched_at + timedelta(minutes=3))
+    assert sensor._estimate is not None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,25 @@
+"""Tests de la escritura agrupada de los ``Store``."""
+from unittest.mock import MagicMock, patch
+
+from custom_components.sentinel_solar.storage import DebouncedSave
+
+
+def test_frequent_changes_are_saved_before_max_delay():
+    """Los cambios continuos no posponen la escritura más allá de ``max_delay``."""
+    store = MagicMock()
+    save = DebouncedSave(store, lambda: {"value": 1}, delay=30, max_delay=120)
+
+    with patch("custom_components.sentinel_solar.storage.time.monotonic") as monotonic:
+        monotonic.return_value = 0.0
+        save.schedule()
+        assert store.async_delay_save.call_args.args[1] == 30
+        monotonic.return_value = 100.0
+        save.schedule()
+        assert store.async_delay_save.call_args.args[1] == 20
+
+        # Al escribir se olvida el cambio pendiente
+        data_func = store.async_delay_save.call_args.args[0]
+        assert data_func() == {"value": 1}
+        monotonic.return_value = 200.0
+        save.schedule()
+        assert store.async_delay_save.call_args.args[1] == 30